@@ -0,0 +1,227 @@
+"""
+Benchmarks for HALEasy document construction, link lookup and traversal.
+
+Documents are generated synthetically with a configurable number of links, embedded resources, nesting depth and
+CURIEs, and traversals are run against a stub HTTP server on localhost, so results only depend on the machine and the
+version of HALEasy being measured.  Results are written as JSON so that runs can be compared:
+
+    python benchmarks/bench_haleasy.py --output before.json
+    ... change HALEasy ...
+    python benchmarks/bench_haleasy.py --output after.json --compare before.json
+"""
+from __future__ import print_function
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import timeit
+import six
+from six.moves import BaseHTTPServer, socketserver
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from haleasy import HALEasy, HALHttpClient  # noqa: E402
+
+
+SIZES = {
+    'small': {'links': 10, 'embedded': 5, 'depth': 1, 'curies': 1},
+    'medium': {'links': 100, 'embedded': 50, 'depth': 2, 'curies': 5},
+    'large': {'links': 1000, 'embedded': 500, 'depth': 2, 'curies': 20},
+}
+
+
+def make_document(path, links, embedded, depth, curies, properties=10):
+    """
+    Return a HAL document as a dict, with the given number of links spread over rels that use the CURIEs, and the given
+    number of embedded resources each of which is itself a document nested up to depth levels deep
+    """
+    doc = dict(('p%s' % i, 'value %s' % i) for i in range(properties))
+    doc['_links'] = {
+        'self': {'href': path},
+        'curies': [{'name': 'c%s' % i, 'href': 'http://rels.bench/%s/{rel}' % i, 'templated': True}
+                   for i in range(curies)],
+        'search': {'href': path + '/search{?q}', 'templated': True},
+    }
+    for i in range(links):
+        rel = 'c%s:rel%s' % (i % curies, i % 10) if curies else 'rel%s' % (i % 10)
+        doc['_links'].setdefault(rel, []).append({'href': '%s/linked/%s' % (path, i), 'name': 'link%s' % i})
+    if depth > 0 and embedded:
+        doc['_embedded'] = {'item': [make_document('%s/items/%s' % (path, i),
+                                                   links=2,
+                                                   embedded=max(embedded // 10, 1) if depth > 1 else 0,
+                                                   depth=depth - 1,
+                                                   curies=0,
+                                                   properties=5)
+                                     for i in range(embedded)]}
+    return doc
+
+
+class StubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    documents = {}
+    protocol_version = 'HTTP/1.1'  # keep connections alive, as a real API server would
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = self.documents.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+def start_stub_server(documents):
+    StubHandler.documents = dict((path, json.dumps(doc).encode('utf-8')) for path, doc in six.iteritems(documents))
+    server = StubServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server, 'http://127.0.0.1:%s' % server.server_address[1]
+
+
+def measure(fn, repeat, number):
+    """
+    Return timings in seconds per call of fn, as a dict of summary statistics over repeat runs of number calls each
+    """
+    runs = sorted(t / number for t in timeit.repeat(fn, repeat=repeat, number=number))
+    return {'min': runs[0],
+            'median': runs[len(runs) // 2],
+            'mean': sum(runs) / len(runs),
+            'max': runs[-1],
+            'repeat': repeat,
+            'number': number}
+
+
+def document_benchmarks(size, params, repeat, number):
+    doc = make_document('/bench', **params)
+    json_str = json.dumps(doc)
+    url = 'http://bench.local/bench'
+    built = HALEasy(url, json_str=json_str)
+    built.links()
+    first_item = built.links(rel='item')[0]
+    rel_with_curie = 'c0:rel1' if params['curies'] else 'rel1'
+
+    def from_json():
+        HALEasy(url, json_str=json_str)
+
+    def from_json_and_link_list():
+        HALEasy(url, json_str=json_str).links()
+
+    def links_by_rel():
+        built.links(rel=rel_with_curie)
+
+    def link_by_rel_and_href():
+        built.link(rel='item', href=first_item.href)
+
+    def links_by_name():
+        built.links(name='link5')
+
+    benchmarks = {
+        'from_json': from_json,
+        'from_json_and_link_list': from_json_and_link_list,
+        'links_by_rel': links_by_rel,
+        'link_by_rel_and_href': link_by_rel_and_href,
+        'links_by_name': links_by_name,
+    }
+    results = {}
+    for name, fn in sorted(benchmarks.items()):
+        results['%s/%s' % (name, size)] = measure(fn, repeat, number)
+    results['from_json/%s' % size]['bytes'] = len(json_str)
+    return results
+
+
+def traversal_benchmarks(repeat, number, hops=10):
+    documents = {}
+    for i in range(hops):
+        page = make_document('/chain/%s' % i, links=20, embedded=10, depth=1, curies=2)
+        page['_links']['next'] = {'href': '/chain/%s' % (i + 1)}
+        documents['/chain/%s' % i] = page
+        for item in page['_embedded']['item']:
+            full = dict(item, extra='only in the full resource')
+            documents[item['_links']['self']['href']] = full
+    documents['/chain/%s' % hops] = make_document('/chain/%s' % hops, links=1, embedded=0, depth=0, curies=0)
+    server, base = start_stub_server(documents)
+    session = HALHttpClient.make_session()
+    try:
+        def follow_chain():
+            h = HALEasy(base + '/chain/0', session=session)
+            for _ in range(hops):
+                h = h.link(rel='next').follow()
+
+        def preview_upgrade():
+            h = HALEasy(base + '/chain/0', session=session)
+            h.link(rel='item').follow()['extra']
+
+        def fetch_without_shared_session():
+            HALEasy(base + '/chain/%s' % hops)
+
+        def fetch_with_shared_session():
+            HALEasy(base + '/chain/%s' % hops, session=session)
+
+        results = {
+            'follow_chain/%s_hops' % hops: measure(follow_chain, repeat, number),
+            'preview_upgrade': measure(preview_upgrade, repeat, number),
+            'fetch/new_session': measure(fetch_without_shared_session, repeat, number),
+            'fetch/shared_session': measure(fetch_with_shared_session, repeat, number),
+        }
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def compare(results, baseline):
+    print('%-40s %12s %12s %8s' % ('benchmark', 'baseline', 'current', 'ratio'))
+    for name in sorted(results['benchmarks']):
+        current = results['benchmarks'][name]['median']
+        if name not in baseline['benchmarks']:
+            print('%-40s %12s %12.6f' % (name, '-', current))
+            continue
+        previous = baseline['benchmarks'][name]['median']
+        print('%-40s %12.6f %12.6f %7.2fx' % (name, previous, current, current / previous))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help='write results to this JSON file instead of stdout')
+    parser.add_argument('--compare', help='print a comparison with the results in this JSON file')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--sizes', default=','.join(SIZES), help='comma separated document sizes to run')
+    parser.add_argument('--no-network', action='store_true', help='skip the benchmarks that use the stub server')
+    args = parser.parse_args(argv)
+
+    results = {'python': platform.python_version(),
+               'implementation': platform.python_implementation(),
+               'platform': platform.platform(),
+               'benchmarks': {}}
+    for size in args.sizes.split(','):
+        number = {'small': 200, 'medium': 20}.get(size, 1)
+        results['benchmarks'].update(document_benchmarks(size, SIZES[size], args.repeat, number))
+    if not args.no_network:
+        results['benchmarks'].update(traversal_benchmarks(args.repeat, number=5))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
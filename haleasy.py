@@ -1,19 +1,50 @@
 import dougrain
 import dougrain.link
 import requests
+import requests.adapters
 import json
+import uritemplate
 import six
+from six.moves import cPickle as pickle
 if six.PY2:
     import urlparse
 else:
     import urllib.parse as urlparse
+import collections
 import copy
+import itertools
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import hashlib
+import importlib
+import io
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+try:
+    import ijson
+except ImportError:  # ijson is only needed by HALEasy.stream()
+    ijson = None
+try:
+    from uritemplate import URITemplate
+except ImportError:  # uritemplate < 2.0 can only expand template strings
+    URITemplate = None
 
 
 class LinkNotFoundError(Exception):
     pass
 
 
+class RedirectLoopError(requests.exceptions.TooManyRedirects):
+    pass
+
+
+class MissingLocationError(requests.exceptions.RequestException):
+    pass
+
+
 def listify(item_or_list):
     if isinstance(item_or_list, list):
         return item_or_list
@@ -21,6 +52,17 @@ def listify(item_or_list):
         return [item_or_list]
 
 
+def share_string(s):
+    """
+    Return the interned copy of s, so that the many links holding equal rels and base URIs share one string object.
+    Strings which can't be interned, like unicode on Python 2, are returned unchanged
+    """
+    try:
+        return six.moves.intern(s)
+    except TypeError:
+        return s
+
+
 def make_preview_url(url_string, host):
     """
     If the given URL has a base (scheme + host) then do nothing, otherwise use the host param to create a full url
@@ -28,21 +70,781 @@ def make_preview_url(url_string, host):
     if not url_string:
         # this is here to support anonymous resources - the full url for an anonymous resource is ''
         return ''
-    if url_string.startswith('http://'):
+    if url_string.startswith(('http://', 'https://')):
         return url_string
     else:
-        return urlparse.urljoin(host, url_string)
+        return resolve_url(host, url_string)
+
+
+def follow_many(links, max_workers=8, return_exceptions=True):
+    """
+    Follow each of the given links using a pool of at most max_workers threads, and return the results in the same
+    order as the links.  If following a link raises an exception then the exception takes that link's place in the
+    results, unless return_exceptions is False in which case the first such exception is raised.  Links followed from
+    the same document share its session, so its POOL_MAXSIZE should be at least max_workers
+    """
+    links = list(links)
+    if not links:
+        return []
+    results = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(links))) as executor:
+        futures = [executor.submit(link.follow) for link in links]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+    return results
+
+
+class JSONCodec(object):
+    """
+    Parses and serialises JSON with a json-compatible module, which must have loads() and dumps() functions.  loads()
+    accepts text or the raw bytes of a response body, so that responses don't have to be decoded first
+    """
+    def __init__(self, module=json):
+        self.module = module
+
+    def loads(self, s):
+        if isinstance(s, six.binary_type) and self.module is json and (3,) <= sys.version_info[:2] < (3, 6):
+            s = s.decode('utf-8')  # the stdlib json module only accepts bytes from Python 3.6
+        return self.module.loads(s)
+
+    def dumps(self, o):
+        return self.module.dumps(o)
+
+
+def default_json_codec(preferred=('orjson', 'ujson', 'simdjson')):
+    """
+    Return a JSONCodec for the first of the preferred JSON modules that is installed, or for the stdlib json module.
+    These modules are faster but don't all parse the same way: orjson, for instance, rejects NaN and turns integers too
+    big for 64 bits into floats.  So this is only used if you set JSON_CODEC = default_json_codec() yourself
+    """
+    for name in preferred:
+        try:
+            return JSONCodec(importlib.import_module(name))
+        except ImportError:
+            pass
+    return JSONCodec(json)
+
+
+DEFAULT_JSON_CODEC = JSONCodec(json)
+
+
+class LazyString(object):
+    """
+    A JSON string literal left undecoded in the raw response body, see HALEasy.LAZY_STRING_THRESHOLD.  decode() returns
+    its value
+    """
+    __slots__ = ('literal',)
+
+    def __init__(self, literal):
+        self.literal = literal  # a memoryview of the body, quotes included
+
+    def decode(self):
+        return json.loads(self.literal.tobytes().decode('utf-8'))
+
+    def __getstate__(self):
+        return self.literal.tobytes()
+
+    def __setstate__(self, state):
+        self.literal = memoryview(state)
+
+    def __repr__(self):
+        return '<LazyString of %s bytes>' % len(self.literal)
+
+
+# A JSON string literal.  Scanning from the start of a document, each match starts at the opening quote of a string,
+# as quotes can't appear outside of strings
+_json_string_literal = re.compile(br'"[^"\\]*(?:\\.[^"\\]*)*"')
+_json_key_separator = re.compile(br'\s*:')
+
+
+def extract_large_strings(body, threshold):
+    """
+    Return a copy of the JSON document body with each string value at least threshold bytes long replaced by a short
+    placeholder string, and a dict mapping the placeholders to LazyStrings which refer to the original values in body
+    without copying them
+    """
+    view = memoryview(body)
+    token = hashlib.sha1(os.urandom(16)).hexdigest()[:12]
+    parts = []
+    lazy_strings = {}
+    position = 0
+    for match in _json_string_literal.finditer(body):
+        start, end = match.span()
+        if end - start < threshold or _json_key_separator.match(body, end):
+            continue  # object keys are always decoded
+        placeholder = u'\x00haleasy-lazy:%s:%s' % (token, len(lazy_strings))
+        lazy_strings[placeholder] = LazyString(view[start:end])
+        parts.append(body[position:start])
+        parts.append(json.dumps(placeholder).encode('utf-8'))
+        position = end
+    if not lazy_strings:
+        return body, lazy_strings
+    parts.append(body[position:])
+    return b''.join(parts), lazy_strings
+
+
+def insert_lazy_strings(json_object, lazy_strings):
+    """
+    Replace the placeholders made by extract_large_strings() in the parsed document with their LazyStrings.  Those in
+    _links, of the document or of any embedded resource, are decoded straight away instead, as hrefs and other link
+    attributes are read by dougrain, which expects strings
+    """
+    remaining = len(lazy_strings)
+    pending = [(json_object, False)]
+    while pending and remaining:
+        container, in_links = pending.pop()
+        items = six.iteritems(container) if isinstance(container, dict) else enumerate(container)
+        for key, value in list(items):
+            if isinstance(value, (dict, list)):
+                pending.append((value, in_links or key == '_links'))
+            elif isinstance(value, six.string_types) and value in lazy_strings:
+                container[key] = lazy_strings[value].decode() if in_links else lazy_strings[value]
+                remaining -= 1
+
+
+def decode_lazy_strings(value):
+    """
+    Return value with any LazyStrings in it, however deeply nested, replaced by their values.  Containers are changed
+    in place
+    """
+    if isinstance(value, LazyString):
+        return value.decode()
+    pending = [value]
+    while pending:
+        container = pending.pop()
+        if not isinstance(container, (dict, list)):
+            continue
+        items = six.iteritems(container) if isinstance(container, dict) else enumerate(container)
+        for key, item in list(items):
+            if isinstance(item, LazyString):
+                container[key] = item.decode()
+            elif isinstance(item, (dict, list)):
+                pending.append(item)
+    return value
+
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+
+class Histogram(object):
+    """
+    Counts of observed values falling at or below each of a fixed set of bucket boundaries, plus their total, minimum
+    and maximum
+    """
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(buckets or self.DEFAULT_BUCKETS)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        for i, boundary in enumerate(self.buckets):
+            if value <= boundary:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def as_dict(self):
+        return {'count': self.count,
+                'total': self.total,
+                'mean': self.total / self.count if self.count else None,
+                'min': self.min,
+                'max': self.max,
+                'buckets': list(zip(self.buckets, self.counts))}
+
+
+class MetricsCollector(object):
+    """
+    An observer for HALHttpClient.OBSERVERS which keeps a latency Histogram for each kind of event, broken down by the
+    rel and by the host the event was for, and counts events and bytes received.  summary() returns them all as plain
+    dicts, suitable for logging or dumping to JSON
+    """
+    def __init__(self, buckets=None):
+        self.buckets = buckets
+        self.histograms = {}
+        self.event_counts = collections.defaultdict(int)
+        self.bytes_received = collections.defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            name = event['event']
+            self.event_counts[name] += 1
+            if event.get('bytes') and name == 'request_end':
+                self.bytes_received[event.get('host')] += event['bytes']
+            if 'elapsed' not in event:
+                return
+            for dimension in ('rel', 'host'):
+                if event.get(dimension) is not None:
+                    key = (name, dimension, event[dimension])
+                    if key not in self.histograms:
+                        self.histograms[key] = Histogram(self.buckets)
+                    self.histograms[key].add(event['elapsed'])
+
+    def histogram(self, event_name, rel=None, host=None):
+        if rel is not None:
+            return self.histograms.get((event_name, 'rel', rel))
+        return self.histograms.get((event_name, 'host', host))
+
+    def summary(self):
+        with self._lock:
+            summary = {'events': dict(self.event_counts),
+                       'bytes_received': dict(self.bytes_received),
+                       'rel': collections.defaultdict(dict),
+                       'host': collections.defaultdict(dict)}
+            for (name, dimension, key), histogram in six.iteritems(self.histograms):
+                summary[dimension][key][name] = histogram.as_dict()
+            summary['rel'] = dict(summary['rel'])
+            summary['host'] = dict(summary['host'])
+            return summary
+
+
+class CacheEntry(object):
+    """
+    A cached response together with the information needed to decide whether it is fresh, and to revalidate it with a
+    conditional request when it is not.  Only the status, headers, URL and body of the response are kept, never the
+    request that was sent for it, so nothing that went out with the request can end up in a cache
+    """
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.headers = dict(response.headers)
+        self.url = response.url
+        self.content = response.content
+        self.encoding = response.encoding
+        self.etag = None
+        self.last_modified = None
+        self.expires = None
+        self.update(response)
+
+    def update(self, response):
+        """
+        Take validators and freshness information from a response, which is either the one being cached or a 304
+        revalidating it
+        """
+        self.etag = response.headers.get('ETag', self.etag)
+        self.last_modified = response.headers.get('Last-Modified', self.last_modified)
+        directives = parse_cache_control(response.headers.get('Cache-Control', ''))
+        self.expires = None
+        if 'no-cache' not in directives:
+            try:
+                self.expires = time.time() + int(directives['max-age'])
+            except (KeyError, TypeError, ValueError):
+                pass
+
+    def response(self):
+        """
+        Return a new requests.Response with the cached status, headers, URL and body
+        """
+        resp = requests.Response()
+        resp.status_code = self.status_code
+        resp.headers = requests.structures.CaseInsensitiveDict(self.headers)
+        resp.url = self.url
+        resp.encoding = self.encoding
+        resp._content = self.content
+        return resp
+
+    def is_fresh(self):
+        return self.expires is not None and time.time() < self.expires
+
+    def validators(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+def parse_cache_control(header_value):
+    """
+    Turn a Cache-Control header value into a dict.  Directives without a value, like no-store, map to None
+    """
+    directives = {}
+    for directive in header_value.split(','):
+        name, _, value = directive.strip().partition('=')
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+class MemoryCache(object):
+    """
+    An in-memory response cache which evicts the least recently used entry once it holds maxsize entries
+    """
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                entry = self._entries.pop(key)
+            except KeyError:
+                return None
+            self._entries[key] = entry  # re-insert to mark as most recently used
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class IdentityMap(MemoryCache):
+    """
+    Remembers HALEasy documents by session and URL, so that a traversal which reaches a resource it has already
+    fetched, or seen embedded, reuses that document instead of fetching it again.  Documents are only ever handed back
+    for the session they were fetched with, so a map can be shared by clients with different credentials.  Entries are
+    dropped after ttl seconds if ttl is given, and the least recently used ones once there are more than maxsize.  A
+    preview never replaces a full document
+    """
+    def __init__(self, maxsize=1024, ttl=None):
+        super(IdentityMap, self).__init__(maxsize=maxsize)
+        self.ttl = ttl
+
+    def get(self, url, session=None, allow_preview=True):
+        key = (session, url)
+        entry = super(IdentityMap, self).get(key)
+        if entry is None:
+            return None
+        doc, expires = entry
+        if expires is not None and time.time() >= expires:
+            self.delete(key)
+            return None
+        if doc.is_preview and not allow_preview:
+            return None
+        return doc
+
+    def add(self, doc, url=None):
+        """
+        Remember doc under the URL it was fetched from, and also under url if that was the URL requested, which differs
+        when the request was redirected
+        """
+        for doc_url in set((doc.fetched_from, url or doc.fetched_from)):
+            if not doc_url:
+                continue  # anonymous resources can't be looked up
+            if doc.is_preview and self.get(doc_url, doc.session, allow_preview=False) is not None:
+                continue
+            expires = None if self.ttl is None else time.time() + self.ttl
+            self.set((doc.session, doc_url), (doc, expires))
+
+
+_resolved_urls = MemoryCache(maxsize=4096)
+
+
+def resolve_url(base, url):
+    """
+    urljoin(base, url), remembering the most recently used results as the same few bases and hrefs turn up in document
+    after document
+    """
+    key = (base, url)
+    resolved = _resolved_urls.get(key)
+    if resolved is None:
+        resolved = urlparse.urljoin(base, url)
+        _resolved_urls.set(key, resolved)
+    return resolved
+
+
+_url_hosts = MemoryCache(maxsize=1024)
+
+
+def url_host(url):
+    """
+    Return the scheme and host part of url, such as http://example.com for http://example.com/a/b?c
+    """
+    host = _url_hosts.get(url)
+    if host is None:
+        parts = urlparse.urlsplit(url)
+        host = share_string(urlparse.urlunsplit(parts[:2] + ('', '', '')))
+        _url_hosts.set(url, host)
+    return host
+
+
+class _UncompiledURITemplate(object):
+    def __init__(self, template):
+        self.template = template
+
+    def expand(self, params):
+        return uritemplate.expand(self.template, params)
+
+
+_compiled_uri_templates = MemoryCache(maxsize=1024)
+
+
+def compile_uri_template(template):
+    """
+    Return an object whose expand(params) method expands the given RFC 6570 template.  The template is parsed once and
+    the result shared by every link with the same template, in any document
+    """
+    compiled = _compiled_uri_templates.get(template)
+    if compiled is None:
+        compiled = URITemplate(template) if URITemplate is not None else _UncompiledURITemplate(template)
+        _compiled_uri_templates.set(template, compiled)
+    return compiled
+
+
+class CurieExpander(object):
+    """
+    Expands CURIEs like ex:widget with one set of curies, as dougrain's Document.expand_curie does, remembering each
+    expansion.  Documents whose curies sections come to the same set of names and templates share one CurieExpander,
+    see curie_expander()
+    """
+    MAXSIZE = 1024
+
+    def __init__(self, curies):
+        self.curies = dict(curies)
+        self._expansions = {}
+
+    def __call__(self, rel):
+        try:
+            return self._expansions[rel]
+        except KeyError:
+            pass
+        prefix, sep, reference = rel.partition(':')
+        curie = self.curies.get(prefix) if sep else None
+        if curie is None:
+            expanded = rel
+        elif curie.is_templated:
+            expanded = compile_uri_template(curie.template).expand({'rel': reference})
+        else:
+            expanded = curie.template
+        if len(self._expansions) >= self.MAXSIZE:
+            self._expansions.clear()
+        self._expansions[rel] = expanded
+        return expanded
+
+
+_curie_expanders = MemoryCache(maxsize=256)
+
+
+def curie_expander(doc):
+    """
+    Return the CurieExpander for the curies of the dougrain Document doc, shared with every other document that has the
+    same curies
+    """
+    key = tuple(sorted((name, curie.template, curie.is_templated) for name, curie in six.iteritems(doc.curies)))
+    expander = _curie_expanders.get(key)
+    if expander is None:
+        expander = CurieExpander(doc.curies)
+        _curie_expanders.set(key, expander)
+    return expander
+
+
+class Projection(object):
+    """
+    The parts of a document to keep when building a HALEasy from it: the properties, the rels of its links and the rels
+    of its embedded resources, each given as a collection of names, or None to keep them all.  Rels may be given as
+    CURIEs or in full.  The self link and the curies are always kept.  Everything else is dropped from the parsed JSON
+    before any dougrain objects, links or previews are made from it.  Embedded resources which are kept are kept whole
+    """
+    ALWAYS_KEPT_RELS = ('self', 'curies')
+
+    def __init__(self, properties=None, rels=None, embedded=None):
+        self.properties = None if properties is None else frozenset(properties)
+        self.rels = None if rels is None else tuple(rels)
+        self.embedded = None if embedded is None else tuple(embedded)
+
+    def apply(self, json_object, base_uri=None):
+        """
+        Return a copy of the parsed document json_object with only the parts we keep.  json_object is not changed
+        """
+        links = json_object.get('_links', {})
+        expand = None
+        if self.rels is not None or self.embedded is not None:
+            expand = curie_expander(dougrain.Document.from_object({'_links': {'curies': links.get('curies', [])}},
+                                                                  base_uri=base_uri))
+        projected = {}
+        for key, value in six.iteritems(json_object):
+            if key == '_links':
+                value = self._keep_rels(value, self.rels, expand, self.ALWAYS_KEPT_RELS)
+            elif key == '_embedded':
+                value = self._keep_rels(value, self.embedded, expand, ())
+            elif self.properties is not None and key not in self.properties:
+                continue
+            projected[key] = value
+        return projected
+
+    @staticmethod
+    def _keep_rels(section, rels, expand, always_kept):
+        if rels is None:
+            return section
+        wanted = set(expand(rel) for rel in rels)
+        return dict((rel, value) for rel, value in six.iteritems(section)
+                    if rel in always_kept or expand(rel) in wanted)
+
+
+class DiskCache(object):
+    """
+    A response cache which pickles entries to files in a directory.  Once the files take up more than max_bytes the
+    least recently used ones are deleted
+    """
+    SUFFIX = '.halcache'
+
+    def __init__(self, directory, max_bytes=100 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + self.SUFFIX)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return None
+        try:
+            os.utime(path, None)  # the modification time records when the entry was last used
+        except OSError:
+            pass
+        return entry
+
+    def set(self, key, entry):
+        path = self._path(key)
+        tmp_path = '%s.%s.tmp' % (path, threading.current_thread().ident)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if os.path.exists(path):
+                os.remove(path)  # os.rename() won't replace an existing file on Windows
+            os.rename(tmp_path, path)
+            self._evict()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in self._files():
+                os.remove(path)
+
+    def _files(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.SUFFIX):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                files.append((path, stat.st_mtime, stat.st_size))
+        return files
+
+    def _evict(self):
+        files = sorted(self._files(), key=lambda f: f[1])
+        total = sum(size for _, _, size in files)
+        while files and total > self.max_bytes:
+            path, _, size = files.pop(0)
+            os.remove(path)
+            total -= size
+
+    def __len__(self):
+        return len(self._files())
+
+
+class Prefetcher(object):
+    """
+    Speculatively follows links with the given rels in background threads as soon as a document is loaded, so that a
+    later follow() of one of them only has to wait for whatever is left of a request that is already under way.  At
+    most max_workers requests run at once.  Prefetched documents are kept by session as well as URL, so a follow only
+    ever gets a document fetched with its own session and credentials.  They wait to be used for at most ttl seconds,
+    and once more than maxsize are waiting the oldest are discarded, cancelling them if they haven't started.  cancel()
+    discards them all.  Links with previews, templated links and the documents found by prefetching are not prefetched
+    from
+    """
+    def __init__(self, rels, max_workers=4, maxsize=64, ttl=60):
+        self.rels = tuple(rels)
+        self.max_workers = max_workers
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._futures = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def prefetch(self, doc):
+        """
+        Start fetching the links from doc that have one of our rels, skipping any already being fetched
+        """
+        for rel in self.rels:
+            for link in doc.links(rel=rel):
+                if link.preview or link.is_templated:
+                    continue
+                key = (link.session, link.url())
+                with self._lock:
+                    self._expire()
+                    if key in self._futures:
+                        continue
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+                    future = self._executor.submit(link._fetch, None, None, {}, prefetch=False)
+                    self._futures[key] = (future, time.time() + self.ttl)
+                    while len(self._futures) > self.maxsize:
+                        self._futures.popitem(last=False)[1][0].cancel()
+
+    def take(self, url, session):
+        """
+        Return the document prefetched for url with session, waiting for it if it is still being fetched, or None if we
+        don't have it or couldn't fetch it.  Each prefetched document is only returned once
+        """
+        with self._lock:
+            self._expire()
+            future, _ = self._futures.pop((session, url), (None, None))
+        if future is None or future.cancelled():
+            return None
+        try:
+            return future.result()
+        except Exception:
+            return None  # the caller's own request will raise the error, if it happens again
+
+    def _expire(self):
+        # Entries all live for ttl seconds, so the ones that have expired are always the oldest
+        now = time.time()
+        while self._futures:
+            future, expires = next(six.itervalues(self._futures))
+            if now < expires:
+                break
+            self._futures.popitem(last=False)
+            future.cancel()
+
+    def cancel(self):
+        with self._lock:
+            futures, self._futures = self._futures, collections.OrderedDict()
+        for future, _ in six.itervalues(futures):
+            future.cancel()
+
+    def close(self):
+        """
+        Cancel everything waiting to be used and stop the worker threads
+        """
+        self.cancel()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __len__(self):
+        return len(self._futures)
+
+
+class _InFlightCall(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# The calls being made by HALHttpClient.coalesce(), by class and key
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def _kwargs_key(kwargs):
+    """
+    Return a value which is equal for equal request kwargs, for keying sessions and coalesced calls on, or None if
+    kwargs can't be pickled.  Auth handlers and the like have an identity-based repr, so kwargs are compared pickled
+    """
+    try:
+        return pickle.dumps(sorted(six.iteritems(kwargs)), pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+
+
+# held while a HALEasy document builds its link list.  Reentrant, as building one can mean building an embedded one
+_link_list_lock = threading.RLock()
 
 
 class HALHttpClient(object):
     DEFAULT_HEADERS = {'Accept': 'application/json',
                        'Content-Type': 'application/json'}
     DEFAULT_METHOD = 'GET'
+    # Connection pool settings for sessions created by make_session().  POOL_CONNECTIONS is the number of per-host
+    # pools to keep, POOL_MAXSIZE the maximum number of connections kept open to any single host
+    POOL_CONNECTIONS = 10
+    POOL_MAXSIZE = 10
+    POOL_BLOCK = False
+    KEEP_ALIVE = True
     SUPPORTED_METHODS = ('GET', 'POST', 'PUT', 'DELETE')
     OK_CODES = {200, 203}
     REDIRECT_WITH_ORIGINAL_METHOD_CODES = {301, 302, 307, 308}
     REDIRECT_WITH_GET_CODES = {201, 303}
     MAYBE_REDIRECT_WITH_GET_CODES = {202, 204, 205}
+    NOT_MODIFIED_CODE = 304
+    PERMANENT_REDIRECT_CODES = {301, 308}
+    # The most redirects _request() follows for one request.  Sessions from make_session() give requests the same limit
+    # for the redirects it follows by itself
+    MAX_REDIRECTS = 30
+    # Permanent redirects we have seen, so that later requests can go straight to where they lead.  Set this to None in
+    # a subclass to always request the original URL
+    PERMANENT_REDIRECTS = MemoryCache(maxsize=1024)
+    # Set this to a MemoryCache or DiskCache (or anything with get/set/delete methods) in a subclass to cache GET
+    # responses by URL.  The cache is shared by everything using the class, so requests which carry credentials, as
+    # auth, cookies or an Authorization header, are neither answered from it nor cached
+    CACHE = None
+    # Used to serialise request data which isn't already a string.  Set this to another JSONCodec in a subclass to
+    # choose a different JSON library
+    JSON_CODEC = DEFAULT_JSON_CODEC
+    # Set this to an IdentityMap in a subclass to have links followed with GET reuse documents already fetched or
+    # embedded, instead of fetching them again
+    IDENTITY_MAP = None
+    # Callables which are passed a dict describing each event, see emit().  HALEasy documents and links send their
+    # events to the observers of their http_client_class
+    OBSERVERS = ()
+    # Set this to True in a subclass to have concurrent GETs of the same URL with the same session and arguments make
+    # only one request, whose response they all share.  Concurrent follows of the same link share the parsed document
+    # too, see coalesce()
+    COALESCE_REQUESTS = False
+
+    @classmethod
+    def add_observer(cls, observer):
+        cls.OBSERVERS = tuple(cls.OBSERVERS) + (observer,)
+
+    @classmethod
+    def emit(cls, event, **fields):
+        """
+        Pass an event to each of the OBSERVERS as a dict with an 'event' key naming it.  The events are:
+        * request_start (url, method, host) and request_end (url, method, host, status, elapsed, bytes) around each
+          HTTP request
+        * cache_hit (url, host, revalidated) when a response comes from CACHE
+        * redirect (url, location, status, host) for each redirect followed by _request()
+        * follow (url, rel, host, elapsed) for each link followed, including fetching and parsing the document
+        * parse (url, host, elapsed, bytes) for each JSON document parsed
+        * link_index (url, host, elapsed, links) for each HALDocLinkList built
+        Times are in seconds.  AsyncHALHttpClient sends the same events
+        """
+        if cls.OBSERVERS:
+            fields['event'] = event
+            for observer in cls.OBSERVERS:
+                observer(fields)
 
     @classmethod
     def request(cls, url, method=None, data=None, session=None, **kwargs):
@@ -51,71 +853,279 @@ class HALHttpClient(object):
         * checks and supplies defaults
         * creates a session object to be used for this chain of requests, unless one is passed in.
         * if data is passed as an object instead of a string, JSONifies it
-        * calls protected _request method, which may recurse and omits all the steps above
+        * calls protected _request method, which follows any redirects and omits all the steps above
         """
         method = method or cls.DEFAULT_METHOD
         if method not in cls.SUPPORTED_METHODS:
             raise NotImplementedError('HTTP method %s is not implemented by this client' % method)
 
+        kwargs_key = cls.COALESCE_REQUESTS and cls._is_get(method, data) and not kwargs.get('stream') and \
+            _kwargs_key(kwargs)
+        if kwargs_key:
+            key = ('response', session, url, kwargs_key)
+            return cls.coalesce(key, lambda: cls._read(cls._uncoalesced_request(url, method, data, session, **kwargs)))
+        return cls._uncoalesced_request(url, method, data, session, **kwargs)
+
+    @classmethod
+    def _is_get(cls, method, data):
+        """
+        Whether a request with this method and data is a plain GET, whose response can be shared and remembered
+        """
+        return (method or cls.DEFAULT_METHOD) == 'GET' and data is None
+
+    @staticmethod
+    def _read(resp):
+        resp.content  # read the body now, rather than in several threads at once later
+        return resp
+
+    @classmethod
+    def _uncoalesced_request(cls, url, method, data, session, **kwargs):
         if not session:
             # The user hasn't given us a session to use, so create a new session with headers and authentication
             # taken from **kwargs or defaults
-            session = requests.Session()
-            for k, v in six.iteritems(kwargs.get('headers', cls.DEFAULT_HEADERS)):
-                session.headers[k] = v  # setting the header dict directly stops the case-insensitivity working
-            session.auth = kwargs.get('auth', None)
+            session = cls.make_session(headers=kwargs.get('headers'), auth=kwargs.get('auth'))
 
         if data is not None and not isinstance(data, six.string_types):
-            data = json.dumps(data)
+            data = cls.JSON_CODEC.dumps(data)
 
         return cls._request(url, method, data, session, **kwargs)
 
+    @classmethod
+    def coalesce(cls, key, fn):
+        """
+        Return fn(), unless another thread is already working out fn() for an equal key using this class, in which
+        case wait for it to finish and return (or raise) what it does instead
+        """
+        key = (cls, key)
+        with _in_flight_lock:
+            call = _in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = _in_flight[key] = _InFlightCall()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with _in_flight_lock:
+                del _in_flight[key]
+            call.done.set()
+        return call.result
+
+    @classmethod
+    def make_session(cls, headers=None, auth=None, pool_connections=None, pool_maxsize=None, pool_block=None,
+                     keep_alive=None):
+        """
+        Create a requests.Session with pooled HTTP and HTTPS adapters.  HALEasy documents keep hold of the session they
+        were fetched with and hand it on to their links and previews, so creating one session up front and passing it
+        in as session= lets a whole traversal reuse the same connections.  Pool settings default to the class attributes
+        """
+        session = requests.Session()
+        for k, v in six.iteritems(cls.DEFAULT_HEADERS if headers is None else headers):
+            session.headers[k] = v  # setting the header dict directly stops the case-insensitivity working
+        session.auth = auth
+        session.max_redirects = cls.MAX_REDIRECTS
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=cls.POOL_CONNECTIONS if pool_connections is None else pool_connections,
+            pool_maxsize=cls.POOL_MAXSIZE if pool_maxsize is None else pool_maxsize,
+            pool_block=cls.POOL_BLOCK if pool_block is None else pool_block)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        if not (cls.KEEP_ALIVE if keep_alive is None else keep_alive):
+            session.headers['Connection'] = 'close'
+        return session
+
+    @classmethod
+    def _cache_response(cls, url, resp, sent_headers):
+        """
+        Keep resp in CACHE if it can be reused or revalidated, given the headers that were sent with its request
+        """
+        directives = parse_cache_control(resp.headers.get('Cache-Control', ''))
+        if 'no-store' in directives:
+            cls.CACHE.delete(url)
+            return
+        if cls._sent_credentials(sent_headers):
+            return  # a netrc file may have added credentials that _sends_credentials() couldn't see coming
+        entry = CacheEntry(resp)
+        if entry.expires is None and not entry.validators():
+            return  # we could neither reuse nor revalidate this response, so there's no point keeping it
+        cls.CACHE.set(url, entry)
+
     @classmethod
     def _request(cls, url, method, data, session, **kwargs):
         """
-        A potentially recursive method which implements the standard behaviour for a REST client in response to various
-        status codes and situations.
+        Implements the standard behaviour for a REST client in response to various status codes and situations,
+        following redirects in a loop of at most MAX_REDIRECTS hops, and raising RedirectLoopError if the same request
+        comes round twice
         """
-        resp = session.request(method,
-                               url,
-                               data=data,
-                               **kwargs)
-        if resp.status_code in cls.OK_CODES:
+        visited = set()
+        for _ in six.moves.range(cls.MAX_REDIRECTS + 1):
+            url = cls._follow_permanent_redirects(url)
+            cls._visit(visited, method, url)
+            request_url = url
+            resp = cls._request_once(url, method, data, session, **kwargs)
+            cls._remember_permanent_redirects(resp)
+            if cls.OBSERVERS:
+                # redirects which requests followed for us
+                for hop, next_hop in zip(resp.history, resp.history[1:] + [resp]):
+                    cls.emit('redirect', url=hop.url, location=next_hop.url, status=hop.status_code,
+                             host=url_host(hop.url))
+            try:
+                next_request = cls._next_request(url, method, data, resp.status_code, resp.headers)
+            except NotImplementedError:
+                # Let requests raise any errors as it usually would
+                resp.raise_for_status()
+                raise
+            if next_request is None:
+                return resp
+            url, method, data = next_request
+            if cls.OBSERVERS:
+                cls.emit('redirect', url=request_url, location=url, status=resp.status_code, host=url_host(request_url))
+        raise requests.exceptions.TooManyRedirects('Exceeded %s redirects' % cls.MAX_REDIRECTS)
+
+    @staticmethod
+    def _visit(visited, method, url):
+        """
+        Add the request to the set of those made while following redirects, raising RedirectLoopError if it is already
+        there
+        """
+        if (method, url) in visited:
+            raise RedirectLoopError('Redirect loop detected: %s %s was requested twice' % (method, url))
+        visited.add((method, url))
+
+    @classmethod
+    def _next_request(cls, url, method, data, status_code, headers):
+        """
+        Return None if a response to a request for url with the given status code and headers is the one to interpret
+        as the HAL document, or the (url, method, data) of the request to make next if it is a redirect.  Shared by the
+        redirect loops of HALHttpClient and its subclasses, so they all follow the same rules
+        """
+        location = headers.get('Location')
+        if status_code in cls.OK_CODES:
             # The server is returning data we should interpret as a HAL document
-            return resp
-        elif resp.status_code in cls.REDIRECT_WITH_ORIGINAL_METHOD_CODES:
-            # We should follow a Location header using the original method to find the document.  The absence of such a
-            # header is an error
-            return cls._request(resp.headers['Location'],
-                                method=method,
-                                session=session,
-                                data=data,
-                                **kwargs)
-        elif resp.status_code in cls.REDIRECT_WITH_GET_CODES:
-            # We should follow a Location header with a GET to find the document.  The absence of such a header is an
-            # error
-            return cls._request(resp.headers['Location'],
-                                method='GET',
-                                session=session,
-                                data=None,
-                                **kwargs)
-        elif resp.status_code in cls.MAYBE_REDIRECT_WITH_GET_CODES:
+            return None
+        elif status_code in cls.REDIRECT_WITH_ORIGINAL_METHOD_CODES or status_code in cls.REDIRECT_WITH_GET_CODES:
+            # We should follow a Location header to find the document, using the original method or a GET.  The
+            # absence of such a header is an error
+            if not location:
+                raise MissingLocationError('HTTP status code %s for %s %s has no Location header'
+                                           % (status_code, method, url))
+            if status_code in cls.REDIRECT_WITH_GET_CODES:
+                return resolve_url(url, location), 'GET', None
+            return resolve_url(url, location), method, data
+        elif status_code in cls.MAYBE_REDIRECT_WITH_GET_CODES:
             # We should _try_ to follow a Location header with a GET to find the document, but there may not be such a
             # header, in which case return the body and url we have
-            if resp.headers['Location']:
-                return cls._request(resp.headers['Location'],
-                                    method='GET',
-                                    session=session,
-                                    data=None,
-                                    **kwargs)
-            else:
-                return resp
+            if not location:
+                return None
+            return resolve_url(url, location), 'GET', None
+        else:
+            # Response wasn't an error, or a non-error we know how to deal with
+            raise NotImplementedError('%s does not handle HTTP status code %s. Response headers were %s'
+                                      % (cls.__name__, status_code, headers))
+
+    @classmethod
+    def _sends_credentials(cls, session, kwargs):
+        """
+        Whether a request made with session and these request kwargs will carry credentials
+        """
+        if session.auth or kwargs.get('auth') or session.cookies or kwargs.get('cookies'):
+            return True
+        headers = requests.structures.CaseInsensitiveDict(session.headers)
+        headers.update(kwargs.get('headers') or {})
+        return cls._sent_credentials(headers)
+
+    @staticmethod
+    def _sent_credentials(headers):
+        return 'Authorization' in headers or 'Cookie' in headers
+
+    @classmethod
+    def _request_once(cls, url, method, data, session, **kwargs):
+        """
+        Make a single request, answering it from CACHE or revalidating a cached response where possible
+        """
+        entry = None
+        request_kwargs = kwargs
+        # streamed responses are read by the caller, so there's no body for us to cache
+        use_cache = cls.CACHE is not None and method == 'GET' and not kwargs.get('stream')
+        # the cache is keyed by URL and shared by every session, so a response for one user mustn't go to another
+        use_cache = use_cache and not cls._sends_credentials(session, kwargs)
+        if use_cache:
+            entry = cls.CACHE.get(url)
+            if entry is not None:
+                if entry.is_fresh():
+                    cls.emit('cache_hit', url=url, host=url_host(url), revalidated=False)
+                    return entry.response()
+                # The cached response is stale, so ask the server whether it has changed since
+                headers = dict(kwargs.get('headers') or {})
+                headers.update(entry.validators())
+                request_kwargs = dict(kwargs, headers=headers)
+        # read once, as an observer added by another thread during the request mustn't see only its end
+        observed = bool(cls.OBSERVERS)
+        if observed:
+            cls.emit('request_start', url=url, method=method, host=url_host(url))
+            start = _clock()
+        resp = session.request(method,
+                               url,
+                               data=data,
+                               **request_kwargs)
+        if observed:
+            cls.emit('request_end', url=url, method=method, host=url_host(url), status=resp.status_code,
+                     elapsed=_clock() - start, bytes=None if kwargs.get('stream') else len(resp.content))
+        if resp.status_code in cls.OK_CODES and use_cache:
+            cls._cache_response(url, resp, resp.request.headers)
+        elif resp.status_code == cls.NOT_MODIFIED_CODE and entry is not None:
+            # Our cached copy is still good, and the 304 may carry a new max-age for it
+            entry.update(resp)
+            cls.CACHE.set(url, entry)
+            cls.emit('cache_hit', url=url, host=url_host(url), revalidated=True)
+            return entry.response()
+        return resp
+
+    @classmethod
+    def _follow_permanent_redirects(cls, url):
+        if cls.PERMANENT_REDIRECTS is None:
+            return url
+        for _ in six.moves.range(cls.MAX_REDIRECTS):
+            target = cls.PERMANENT_REDIRECTS.get(url)
+            if target is None:
+                break
+            url = target
+        return url
+
+    @classmethod
+    def _remember_permanent_redirects(cls, resp):
+        """
+        Record the permanent redirects in resp, including those requests followed for us, each mapped to the furthest
+        URL it leads to through permanent redirects only
+        """
+        if cls.PERMANENT_REDIRECTS is None:
+            return
+        if resp.status_code in cls.PERMANENT_REDIRECT_CODES and resp.headers.get('Location'):
+            target = resolve_url(resp.url, resp.headers['Location'])
+            cls.PERMANENT_REDIRECTS.set(resp.url, target)
         else:
-            # Let requests raise any errors as it usually would
-            resp.raise_for_status()
-        # Response wasn't an error, or a non-error we know how to deal with
-        raise NotImplementedError('HALHttpClient._http() does not handle HTTP status code %s. Response headers were %s',
-                                  (resp.status_code, resp.headers))
+            target = resp.url
+        for hop in reversed(resp.history):
+            if hop.status_code in cls.PERMANENT_REDIRECT_CODES:
+                cls.PERMANENT_REDIRECTS.set(hop.url, target)
+            else:
+                target = hop.url
+
+
+def _optional_link_attribute(key):
+    def getter(self):
+        try:
+            return self.o[key]
+        except KeyError:
+            raise AttributeError(key)
+    return property(getter)
 
 
 class HALEasyLink(dougrain.link.Link):
@@ -125,25 +1135,114 @@ class HALEasyLink(dougrain.link.Link):
     """
     HTTP_CLIENT_CLASS = HALHttpClient
 
-    def __init__(self, json_object, base_uri=None, rel=None, hal_class=None, preview=None):
-        super(HALEasyLink, self).__init__(json_object, base_uri)
-        self.base_uri = base_uri
-        self.rel = rel
+    def __init__(self, json_object, base_uri=None, rel=None, hal_class=None, preview=None, session=None,
+                 http_client_class=None):
+        # We don't call dougrain.link.Link.__init__, which copies values out of the link JSON onto the instance.  The
+        # properties below read them from the JSON instead, so that a link only holds what can't be derived from it
+        json_object['href']  # a link without an href is an error, as in dougrain
+        self.o = json_object
+        self.base_uri = share_string(base_uri)
+        self.rel = share_string(rel)
         self._hal_class = hal_class
         self.preview = preview
+        self.session = session
+        self.http_client_class = http_client_class or self.HTTP_CLIENT_CLASS
+
+    href = property(lambda self: self.o['href'])
+    name = _optional_link_attribute('name')
+    title = _optional_link_attribute('title')
+    type = _optional_link_attribute('type')
+    profile = _optional_link_attribute('profile')
+    hreflang = _optional_link_attribute('hreflang')
+    deprecation = _optional_link_attribute('deprecation')
+
+    @property
+    def is_templated(self):
+        return self.o.get('templated', False) is True
+
+    @property
+    def variables(self):
+        return dougrain.link.extract_variables(self.href) if self.is_templated else []
+
+    @property
+    def template(self):
+        if self.base_uri is None:
+            return self.href
+        return resolve_url(self.base_uri, self.href)
+
+    def url(self, **kwargs):
+        if self.is_templated:
+            return compile_uri_template(self.template).expand(kwargs)
+        else:
+            return self.template
+
+    def expand_many(self, params_list):
+        """
+        Return the URL for each dict of template parameters in params_list, as url(**params) would
+        """
+        if not self.is_templated:
+            return [self.template for _ in params_list]
+        compiled = compile_uri_template(self.template)
+        return [compiled.expand(params) for params in params_list]
 
     def as_object_with_rel(self):
         o = {'rel': self.rel}
         o.update(self.as_object())
         return o
 
+    def matches(self, want_params):
+        """
+        True if every name and value in want_params is in as_object_with_rel(), without building that dict
+        """
+        for k, v in six.iteritems(want_params):
+            if k in self.o:
+                if self.o[k] != v:
+                    return False  # the key exists but the values don't match
+            elif k != 'rel' or self.rel != v:
+                return False  # the key doesn't exist, or it's the rel and that doesn't match
+        return True
+
     def follow(self, method=None, data=None, **link_params):
         if self.preview:
             return self.preview
         else:
-            url = self.url(**link_params)
-            response = self.HTTP_CLIENT_CLASS.request(url, method=method, data=data)
-            return self._hal_class(response.url, json_str=response.text, preview=self.preview)
+            return self._fetch(method, data, link_params)
+
+    def _fetch(self, method, data, link_params, allow_preview=True, prefetch=True):
+        url = self.url(**link_params)
+        start = _clock()
+        is_get = self.http_client_class._is_get(method, data)
+        identity_map = self.http_client_class.IDENTITY_MAP
+        if identity_map is not None and is_get:
+            known = identity_map.get(url, self.session, allow_preview=allow_preview)
+            if known is not None:
+                return known
+        # prefetch is False when the Prefetcher itself is fetching, in which case we mustn't consult or feed it
+        prefetcher = self._hal_class.PREFETCHER if prefetch else None
+        target = prefetcher.take(url, self.session) if prefetcher is not None and is_get else None
+        if target is None and is_get and self.http_client_class.COALESCE_REQUESTS:
+            # concurrent follows of the same URL, with the same session and preview, share one parsed document
+            target = self.http_client_class.coalesce(('document', self._hal_class, self.session, url, self.preview),
+                                                     lambda: self._request_document(url, method, data, is_get))
+        elif target is None:
+            target = self._request_document(url, method, data, is_get)
+        if prefetcher is not None:
+            prefetcher.prefetch(target)
+        if self.http_client_class.OBSERVERS:
+            self.http_client_class.emit('follow', url=url, rel=self.rel, host=url_host(url), elapsed=_clock() - start)
+        return target
+
+    def _request_document(self, url, method, data, is_get):
+        response = self.http_client_class.request(url, method=method, data=data, session=self.session)
+        target = self._hal_class(response.url,
+                                 json_str=response.content,
+                                 preview=self.preview,
+                                 session=self.session,
+                                 http_client_class=self.http_client_class)
+        if self.http_client_class.IDENTITY_MAP is not None and is_get:
+            # the response to any other method isn't what a GET of the URL would return
+            self.http_client_class.IDENTITY_MAP.add(target, url=url)
+        return target
 
     def __getitem__(self, item):
         return self.as_object()[item]
@@ -153,29 +1252,41 @@ class HALEasyLink(dougrain.link.Link):
 
 
 class HALDocLinkList(list):
-    def __init__(self, doc, host, link_class, haleasy_class):
+    def __init__(self, doc, host, link_class, haleasy_class, session=None, http_client_class=None):
         super(HALDocLinkList, self).__init__()
+        # links() looks links up by rel, or by rel and href, in these indexes instead of scanning the whole list
+        self._rel_index = {}
+        self._rel_href_index = {}
+        # The rels in doc.links and doc.embedded are already expanded, so only the rels we are asked for need this
+        self.expand_curie = curie_expander(doc)
 
         # Add all the links from the _links sections
         for rel, links in six.iteritems(doc.links):
             for link in listify(links):
-                self.append(link_class(link.as_object(),
-                                       base_uri=host,
-                                       rel=rel,
-                                       hal_class=haleasy_class))
+                self._add(link_class(link.as_object(),
+                                     base_uri=host,
+                                     rel=rel,
+                                     hal_class=haleasy_class,
+                                     session=session,
+                                     http_client_class=http_client_class))
 
         # Add (or enhance) links to embedded resources
         for rel in doc.embedded:
             for embedded_resource in listify(doc.embedded[rel]):
                 # create a HALEasy object for each embedded resource
                 preview = haleasy_class(make_preview_url(embedded_resource.url(), host),
-                                        json_str=json.dumps(embedded_resource.as_object()),
-                                        is_preview=True)
+                                        json_object=embedded_resource.as_object(),
+                                        is_preview=True,
+                                        session=session,
+                                        http_client_class=http_client_class)
+                identity_map = getattr(http_client_class, 'IDENTITY_MAP', None)
+                if identity_map is not None:
+                    identity_map.add(preview)
                 try:
                     # if there are links to the embedded resource in the parent document, set the .preview attribute
                     # of those links to the embedded resource
                     direct_links = []
-                    for link in self.links(doc.expand_curie, rel=rel, href=preview.doc.links['self'].href):
+                    for link in self.links(self.expand_curie, rel=rel, href=preview.doc.links['self'].href):
                         link.preview = preview
                         direct_links.append(link)
                     if not direct_links:
@@ -193,8 +1304,15 @@ class HALDocLinkList(list):
                                           base_uri=preview.host,
                                           rel=rel,
                                           hal_class=haleasy_class,
-                                          preview=preview)
-                    self.append(new_link)
+                                          preview=preview,
+                                          session=session,
+                                          http_client_class=http_client_class)
+                    self._add(new_link)
+
+    def _add(self, link):
+        self.append(link)
+        self._rel_index.setdefault(link.rel, []).append(link)
+        self._rel_href_index.setdefault((link.rel, link.href), []).append(link)
 
     def links(self, __curie_expander, **want_params):
         """
@@ -207,23 +1325,17 @@ class HALDocLinkList(list):
         H.links(rel='next')
         H.links(rel='next', profile='video')
         """
+        if not want_params:
+            return list(self)
         if 'rel' in want_params:
-            want_params['rel'] = __curie_expander(want_params['rel'])
-        links_found = []
-        for link in self:
-            if not want_params:
-                links_found.append(link)
+            rel = __curie_expander(want_params.pop('rel'))
+            if 'href' in want_params:
+                candidates = self._rel_href_index.get((rel, want_params.pop('href')), [])
             else:
-                has_params = link.as_object_with_rel()
-                for k, v in six.iteritems(want_params):
-                    try:
-                        if has_params[k] != v:
-                            break  # the key exists but the values don't match
-                    except KeyError:
-                        break  # the key doesn't exist
-                else:  # this else belongs to the for loop - executed if all param values matched
-                    links_found.append(link)
-        return links_found
+                candidates = self._rel_index.get(rel, [])
+        else:
+            candidates = self
+        return [link for link in candidates if link.matches(want_params)]
 
     def link(self, __curie_expander, **want_params):
         """
@@ -242,6 +1354,15 @@ class HALDocLinkList(list):
 class HALEasy(object):
     HTTP_CLIENT_CLASS = HALHttpClient
     LINK_CLASS = HALEasyLink
+    JSON_CODEC = DEFAULT_JSON_CODEC
+    # Set this to a Prefetcher in a subclass to start fetching the links most likely to be followed next as soon as a
+    # document is loaded
+    PREFETCHER = None
+    # Set this to a number of bytes in a subclass to leave string values at least that long undecoded in the response
+    # body until they are read with H[item] or properties(), see extract_large_strings()
+    LAZY_STRING_THRESHOLD = None
+    __slots__ = ('fetched_from', 'doc', '_link_list', 'is_preview', 'preview', 'session', 'http_client_class',
+                 '__weakref__')
 
     def __init__(self,
                  url,
@@ -251,51 +1372,139 @@ class HALEasy(object):
                  is_preview=False,
                  preview=None,
                  http_client_class=None,
+                 session=None,
+                 json_object=None,
+                 projection=None,
                  **kwargs):
-        # If json_str is provided then we use that to build the document, otherwise we follow the url.  Note even when
-        # providing a json_str you also need to provide a URL, because this is a HAL client, not a HAL document parser,
-        # and without a URL it can't always know where to go next
+        # If json_str or an already parsed json_object is provided then we use that to build the document, otherwise we
+        # follow the url.  Note even when providing a json_str you also need to provide a URL, because this is a HAL
+        # client, not a HAL document parser, and without a URL it can't always know where to go next
         self.fetched_from = None
         self.doc = None
         self._link_list = None
         self.is_preview = is_preview
+        self.session = session
         self._maybe_set_http_client_class(http_client_class)
-        if not json_str:
-            self.from_url(url, method=method, data=data, **kwargs)
+        if json_object is not None:
+            self.from_object(url, json_object, is_preview=is_preview, projection=projection)
+            self.preview = preview
+        elif not json_str:
+            self.from_url(url, method=method, data=data, session=session, projection=projection, **kwargs)
         else:
-            self.from_json(url, json_str, is_preview=is_preview)
+            self.from_json(url, json_str, is_preview=is_preview, projection=projection)
             self.preview = preview
 
     def _maybe_set_http_client_class(self, http_client_class):
         if not hasattr(self, 'http_client_class'):
             self.http_client_class = http_client_class or self.HTTP_CLIENT_CLASS
 
-    def from_url(self, url, method=None, data=None, http_client_class=None, **kwargs):
+    def from_url(self, url, method=None, data=None, http_client_class=None, session=None, projection=None, **kwargs):
+        self._maybe_set_http_client_class(http_client_class)
+        client = self.http_client_class
+        kwargs_key = not session and client.COALESCE_REQUESTS and client._is_get(method, data) and \
+            _kwargs_key(kwargs)
+        if kwargs_key:
+            # each call would make its own session, so coalesce here on the kwargs it is made from, headers and auth
+            # included, and share the session as well as the response
+            session, response = client.coalesce(('url', url, kwargs_key),
+                                                lambda: self._request_with_new_session(url, method, data, **kwargs))
+        else:
+            if not session:
+                # Create the session here rather than letting the client do it, so that links and previews of this
+                # document reuse its connection pool when they are followed
+                session = client.make_session(headers=kwargs.get('headers'), auth=kwargs.get('auth'))
+            response = client.request(url, method=method, data=data, session=session, **kwargs)
+        self.session = session
+        self.from_response(response, http_client_class=http_client_class, projection=projection)
+        if self.http_client_class.IDENTITY_MAP is not None and projection is None and \
+                self.http_client_class._is_get(method, data):
+            # a projected document is missing parts that later follows of the same URL may want, and the response to
+            # any other method isn't what a GET of the URL would return
+            self.http_client_class.IDENTITY_MAP.add(self, url=url)
+        if self.PREFETCHER is not None:
+            self.PREFETCHER.prefetch(self)
+
+    def _request_with_new_session(self, url, method, data, **kwargs):
+        session = self.http_client_class.make_session(headers=kwargs.get('headers'), auth=kwargs.get('auth'))
+        return session, self.http_client_class.request(url, method=method, data=data, session=session, **kwargs)
+
+    def from_response(self, response, http_client_class=None, projection=None):
         self._maybe_set_http_client_class(http_client_class)
-        response = self.http_client_class.request(url, method=method, data=data, **kwargs)
-        self.from_response(response, http_client_class=http_client_class)
+        self.from_json(response.url, response.content, is_preview=False, projection=projection)
 
-    def from_response(self, response, http_client_class=None):
+    def from_json(self, url, json_str, is_preview=None, http_client_class=None, projection=None):
+        """
+        Build the document from JSON text, or bytes of UTF-8 encoded JSON, using JSON_CODEC to parse it.  If a
+        Projection is given only the parts of the document it keeps are built
+        """
         self._maybe_set_http_client_class(http_client_class)
-        self.from_json(response.url, response.text, is_preview=False)
+        start = _clock()
+        lazy_strings = None
+        if self.LAZY_STRING_THRESHOLD is not None and isinstance(json_str, six.binary_type):
+            body, lazy_strings = extract_large_strings(json_str, self.LAZY_STRING_THRESHOLD)
+        else:
+            body = json_str
+        json_object = self.JSON_CODEC.loads(body)
+        if lazy_strings:
+            insert_lazy_strings(json_object, lazy_strings)
+        if self.http_client_class.OBSERVERS:
+            self.http_client_class.emit('parse', url=url, host=url_host(url), elapsed=_clock() - start,
+                                        bytes=len(json_str))
+        self.from_object(url, json_object, is_preview=is_preview, projection=projection)
+
+    def from_object(self, url, json_object, is_preview=None, http_client_class=None, projection=None):
+        """
+        Build the document from an already parsed JSON object.  Embedded resources are turned into previews this way,
+        using the object their parent was parsed into, so a document is only ever parsed once
+        """
+        if projection is not None:
+            json_object = projection.apply(json_object, base_uri=url)
+        self.from_document(url, dougrain.Document.from_object(json_object, base_uri=url),
+                           is_preview=is_preview, http_client_class=http_client_class)
 
-    def from_json(self, url, json_str, is_preview=None, http_client_class=None):
+    def from_document(self, url, doc, is_preview=None, http_client_class=None):
         self._maybe_set_http_client_class(http_client_class)
         self.fetched_from = url
-        self.doc = dougrain.Document.from_object(json.loads(json_str), base_uri=url)
+        self.doc = doc
         self.is_preview = is_preview
-        self._link_list = HALDocLinkList(self.doc, self.host, self.LINK_CLASS, type(self))
+        self._link_list = None  # built on first use by _get_link_list(), as many callers only want properties
+
+    def _get_link_list(self):
+        link_list = self._link_list
+        if link_list is not None:
+            return link_list
+        # documents are shared between threads by coalescing, the identity map and the prefetcher, so make sure only
+        # one of them builds the link list and the others wait for it
+        with _link_list_lock:
+            link_list = self._link_list
+            if link_list is not None:
+                return link_list
+            start = _clock()
+            link_list = HALDocLinkList(self.doc, self.host, self.LINK_CLASS, type(self),
+                                       session=self.session,
+                                       http_client_class=self.http_client_class)
+            self._link_list = link_list
+        if self.http_client_class.OBSERVERS:
+            self.http_client_class.emit('link_index', url=self.fetched_from, host=self.host,
+                                        elapsed=_clock() - start, links=len(link_list))
+        return link_list
 
     @property
     def host(self):
-        parts = urlparse.urlsplit(self.fetched_from)
-        return urlparse.urlunsplit(parts[:2]+('', '', ''))
+        return url_host(self.fetched_from)
+
+    def _snapshot(self):
+        """
+        Return a shallow copy of this document, to keep as the .preview of the full resource it is being upgraded to.
+        _update() replaces the doc and link list rather than changing them, so the copy can share them
+        """
+        return copy.copy(self)
 
     def _update(self, other):
         self.doc = other.doc
         self.is_preview = other.is_preview
         # we don't update our .preview property
-        self._link_list = other._link_list
+        self._link_list = other._get_link_list()  # built now, as other's links resolve against other's host
 
     def __getitem__(self, item):
         """
@@ -303,25 +1512,370 @@ class HALEasy(object):
         the dougrain document object use H.doc
         """
         try:
-            return self.doc.properties[item]
+            return self._property(item)
         except KeyError:
             if self.is_preview:
-                target = self.link(rel='self').follow()
-                clone = copy.deepcopy(self)
+                # the self link of a preview has no preview of its own, so this fetches the full resource, unless we
+                # already have it
+                target = self.link(rel='self')._fetch(None, None, {}, allow_preview=False)
+                clone = self._snapshot()
                 self._update(target)
                 self.preview = clone
+                if self.http_client_class.IDENTITY_MAP is not None:
+                    self.http_client_class.IDENTITY_MAP.add(self)
                 return self[item]
             else:
                 raise
 
+    def _property(self, item):
+        # Read the property straight from the document's JSON, as doc.properties makes a copy of the whole of it
+        if item in self.doc.RESERVED_ATTRIBUTE_NAMES:
+            raise KeyError(item)
+        value = self.doc.o[item]
+        if self.LAZY_STRING_THRESHOLD is not None:
+            decoded = decode_lazy_strings(value)
+            if decoded is not value:
+                self.doc.o[item] = value = decoded
+        return value
+
     def properties(self):
-        return self.doc.properties
+        properties = self.doc.properties
+        if self.LAZY_STRING_THRESHOLD is not None:
+            for key in properties:
+                properties[key] = self._property(key)
+        return properties
 
     def links(self, **want_params):
-        return self._link_list.links(self.doc.expand_curie, **want_params)
+        link_list = self._get_link_list()
+        return link_list.links(link_list.expand_curie, **want_params)
 
     def link(self, **want_params):
-        return self._link_list.link(self.doc.expand_curie, **want_params)
+        link_list = self._get_link_list()
+        return link_list.link(link_list.expand_curie, **want_params)
 
     def rels(self):
         return self.doc.links.keys()
+
+    def iter_pages(self, rel='next', prefetch=True):
+        """
+        Yield this document, then each page of the collection reached by following rel links from the one before.  With
+        prefetch on, the next page is fetched in a background thread while the caller processes the current one
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            page = self
+            while page is not None:
+                if prefetch:
+                    next_page = executor.submit(page._follow_optional, rel)
+                    yield page
+                    page = next_page.result()
+                else:
+                    yield page
+                    page = page._follow_optional(rel)
+
+    def iter_items(self, embedded_rel, rel='next', prefetch=True):
+        """
+        Yield the embedded resources with the given rel from every page of the collection, see iter_pages()
+        """
+        for page in self.iter_pages(rel=rel, prefetch=prefetch):
+            for link in page.links(rel=embedded_rel):
+                if link.preview:
+                    yield link.preview
+
+    def iter_template_pages(self, rel, param='page', start=1, stop=None, max_workers=4):
+        """
+        For collections which offer a templated link to any page, such as {"href": "/items{?page}", "templated": true},
+        fetch pages start, start + 1, ... up to max_workers at a time and yield them in order.  Without a stop value,
+        iteration ends at the first page which returns a 404
+        """
+        link = self.link(rel=rel)
+        numbers = itertools.count(start) if stop is None else iter(six.moves.range(start, stop))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = collections.deque(executor.submit(link.follow, **{param: n})
+                                        for n in itertools.islice(numbers, max_workers))
+            while pending:
+                try:
+                    page = pending.popleft().result()
+                except requests.HTTPError as e:
+                    if stop is None and e.response is not None and e.response.status_code == 404:
+                        break  # we've gone past the last page
+                    raise
+                for n in itertools.islice(numbers, 1):
+                    pending.append(executor.submit(link.follow, **{param: n}))
+                yield page
+
+    def _follow_optional(self, rel):
+        try:
+            return self.link(rel=rel).follow()
+        except LinkNotFoundError:
+            return None
+
+    @classmethod
+    def stream(cls, url, method=None, data=None, session=None, http_client_class=None, **kwargs):
+        """
+        Fetch url and return a HALStream, which parses the response body as it is downloaded instead of reading it all
+        into memory first.  Needs the ijson package
+        """
+        if ijson is None:
+            raise ImportError('HALEasy.stream() needs ijson, install it with pip install haleasy[stream]')
+        http_client_class = http_client_class or cls.HTTP_CLIENT_CLASS
+        if not session:
+            session = http_client_class.make_session(headers=kwargs.get('headers'), auth=kwargs.get('auth'))
+        response = http_client_class.request(url, method=method, data=data, session=session, stream=True, **kwargs)
+        return HALStream(response, cls, session=session, http_client_class=http_client_class)
+
+    def follow_all(self, max_workers=8, **want_params):
+        """
+        Follow every link matching want_params concurrently, see follow_many().  H.follow_all(rel='item') returns the
+        item resources in link order, with an exception in place of any that could not be fetched
+        """
+        return follow_many(self.links(**want_params), max_workers=max_workers)
+
+    # The first bytes of every snapshot written by dump().  The last byte is the format version
+    SNAPSHOT_MAGIC = b'HALEASY\x01'
+
+    def dump(self, f=None):
+        """
+        Write a snapshot of this document to the binary file f, or return it as bytes if f is None.  The snapshot holds
+        the parsed document with its link list and the link lists of its previews already built, so load() skips all
+        of that work.  Sessions are not saved, see load()
+        """
+        self._materialise()
+        if f is None:
+            f = io.BytesIO()
+            self.dump(f)
+            return f.getvalue()
+        f.write(self.SNAPSHOT_MAGIC)
+        pickler = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+        sessions = (requests.Session,) if self.session is None else (requests.Session, type(self.session))
+        pickler.persistent_id = lambda obj: 'session' if isinstance(obj, sessions) else None
+        pickler.dump(self)
+
+    @classmethod
+    def load(cls, f, session=None):
+        """
+        Return the document saved by dump() in f, which can be bytes, a binary file or an mmap.mmap of one, so that
+        several processes can load snapshots from the same pages of memory.  The document and everything reached from it
+        use the given session, or create their own sessions when followed if it is None
+        """
+        if isinstance(f, (six.binary_type, bytearray, memoryview)):
+            f = io.BytesIO(f)
+        if f.read(len(cls.SNAPSHOT_MAGIC)) != cls.SNAPSHOT_MAGIC:
+            raise ValueError('not a HALEasy snapshot, or one written by an incompatible version')
+        unpickler = pickle.Unpickler(f)
+        unpickler.persistent_load = lambda pid: session
+        return unpickler.load()
+
+    def _materialise(self):
+        """
+        Build the link lists of this document and of every preview reachable from it, so that they are saved by dump()
+        """
+        pending = [self]
+        seen = set()
+        while pending:
+            doc = pending.pop()
+            if id(doc) in seen:
+                continue
+            seen.add(id(doc))
+            for link in doc._get_link_list():
+                if link.preview is not None:
+                    pending.append(link.preview)
+
+
+class HALStream(object):
+    """
+    Iterates over the _links and _embedded sections of a HAL document as they are downloaded, so that very large
+    collections can be processed without holding the whole document in memory.  Iterating yields (rel, item) pairs in
+    document order, where item is a link for entries in _links and a preview document for embedded resources.  Rels
+    are CURIE-expanded using the curies seen so far, which HAL documents usually put first.  Top level properties are
+    collected in .properties as they are passed.  A stream can only be iterated once
+    """
+    LINKS_KEY = '_links'
+    EMBEDDED_KEY = '_embedded'
+    CURIES_REL = 'curies'
+
+    def __init__(self, response, hal_class, session=None, http_client_class=None):
+        self.response = response
+        self.fetched_from = response.url
+        self.properties = {}
+        self._hal_class = hal_class
+        self._session = session
+        self._http_client_class = http_client_class
+        self._curies = {}
+        self.host = url_host(self.fetched_from)
+
+    def __iter__(self):
+        self.response.raw.decode_content = True
+        events = iter(ijson.basic_parse(self.response.raw, use_float=True))
+        next(events)  # the start_map of the document itself
+        try:
+            for event, key in events:
+                if event == 'end_map':
+                    break
+                event, value = next(events)
+                if key == self.LINKS_KEY and event == 'start_map':
+                    for rel, link in self._iter_section(events):
+                        if rel == self.CURIES_REL:
+                            self._curies[link['name']] = dougrain.link.Link(link, self.host)
+                        else:
+                            yield rel, self._make_link(rel, link)
+                elif key == self.EMBEDDED_KEY and event == 'start_map':
+                    for rel, resource in self._iter_section(events):
+                        yield rel, self._make_preview(resource)
+                else:
+                    self.properties[key] = self._read_value(events, event, value)
+        finally:
+            self.close()
+
+    def links(self, rel=None):
+        return (item for item_rel, item in self if isinstance(item, dougrain.link.Link) and rel in (None, item_rel))
+
+    def embedded(self, rel=None):
+        return (item for item_rel, item in self if isinstance(item, HALEasy) and rel in (None, item_rel))
+
+    def close(self):
+        self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _iter_section(self, events):
+        """
+        Yield (rel, object) for each item of the _links or _embedded map whose start_map has just been read, consuming
+        events up to and including the matching end_map
+        """
+        for event, rel in events:
+            if event == 'end_map':
+                return
+            rel = self._expand_curie(rel)
+            event, value = next(events)
+            if event == 'start_array':
+                for event, value in events:
+                    if event == 'end_array':
+                        break
+                    yield rel, self._read_value(events, event, value)
+            else:
+                yield rel, self._read_value(events, event, value)
+
+    @staticmethod
+    def _read_value(events, event, value):
+        builder = ijson.common.ObjectBuilder()
+        depth = 0
+        while True:
+            builder.event(event, value)
+            if event in ('start_map', 'start_array'):
+                depth += 1
+            elif event in ('end_map', 'end_array'):
+                depth -= 1
+            if depth == 0:
+                return builder.value
+            event, value = next(events)
+
+    def _expand_curie(self, rel):
+        prefix, _, reference = rel.partition(':')
+        if reference and prefix in self._curies:
+            return self._curies[prefix].url(rel=reference)
+        return rel
+
+    def _make_link(self, rel, link):
+        return self._hal_class.LINK_CLASS(link,
+                                          base_uri=self.host,
+                                          rel=rel,
+                                          hal_class=self._hal_class,
+                                          session=self._session,
+                                          http_client_class=self._http_client_class)
+
+    def _make_preview(self, resource):
+        try:
+            self_href = resource[self.LINKS_KEY]['self']['href']
+        except (KeyError, TypeError):
+            self_href = ''
+        return self._hal_class(make_preview_url(self_href, self.host),
+                               json_object=resource,
+                               is_preview=True,
+                               session=self._session,
+                               http_client_class=self._http_client_class)
+
+
+def crawl(root_url, rels=None, max_depth=None, max_workers=None, hal_class=None, session=None, executor=None,
+          return_exceptions=True, **kwargs):
+    """
+    Walk the HAL graph reachable from root_url breadth first, yielding each document as soon as it has been fetched.
+    Fetching and parsing happen in a pool of max_workers processes (one per CPU by default), or in the given executor,
+    and documents come back to this process as dump() snapshots loaded with the given session.  Only links with one of
+    the given rels are followed, or all links if rels is None, and only to max_depth links away from the root.  Each
+    resource is fetched once, however many links lead to it, as judged by its URL and its self href.  Templated links
+    are not followed.  hal_class must be importable by the worker processes, and kwargs, such as headers and auth, are
+    passed to it for every fetch.  If a fetch fails the exception is yielded in place of the document, unless
+    return_exceptions is False in which case it is raised
+    """
+    hal_class = hal_class or HALEasy
+    max_workers = max_workers or multiprocessing.cpu_count()
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    visited = {root_url}
+    queue = collections.deque([(root_url, 0)])
+    pending = {}
+    try:
+        while queue or pending:
+            # Only keep a few fetches per worker submitted, so that the crawl stays breadth first
+            while queue and len(pending) < 2 * max_workers:
+                url, depth = queue.popleft()
+                pending[executor.submit(_crawl_fetch, hal_class, url, rels, kwargs)] = (url, depth)
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, depth = pending.pop(future)
+                try:
+                    snapshot, self_url, urls = future.result()
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    yield e
+                    continue
+                if self_url != url:
+                    if self_url in visited:
+                        continue  # we have reached this resource by another URL
+                    visited.add(self_url)
+                if max_depth is None or depth < max_depth:
+                    for next_url in urls:
+                        if next_url not in visited:
+                            visited.add(next_url)
+                            queue.append((next_url, depth + 1))
+                yield hal_class.load(snapshot, session=session)
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=True)
+
+
+# The session each crawl worker process uses for each set of kwargs, so its connections are reused between fetches
+_crawl_sessions = {}
+
+
+def _crawl_fetch(hal_class, url, rels, kwargs):
+    """
+    Fetch and parse url for crawl(), returning the document's snapshot, its self URL and the URLs it links to
+    """
+    # kwargs arrive as a fresh copy for every fetch.  They can only fail to pickle when the executor runs in this
+    # process, and then we can't tell them apart so the session isn't kept
+    kwargs_key = _kwargs_key(kwargs)
+    session = _crawl_sessions.get((hal_class, kwargs_key))
+    if session is None:
+        session = hal_class.HTTP_CLIENT_CLASS.make_session(headers=kwargs.get('headers'), auth=kwargs.get('auth'))
+        if kwargs_key is not None:
+            _crawl_sessions[hal_class, kwargs_key] = session
+    doc = hal_class(url, session=session, **kwargs)
+    try:
+        self_url = doc.link(rel='self').url()
+    except LinkNotFoundError:
+        self_url = doc.fetched_from
+    if rels is None:
+        links = doc.links()
+    else:
+        links = [link for rel in rels for link in doc.links(rel=rel)]
+    urls = [link.url() for link in links if link.href and not link.is_templated]
+    return doc.dump(), self_url, urls
@@ -0,0 +1,229 @@
+"""
+asyncio versions of the HALEasy classes, using aiohttp as the HTTP transport.  Requires Python 3.5 or later and aiohttp,
+which can be installed with pip install haleasy[async]
+"""
+import aiohttp
+from multidict import CIMultiDict
+from requests.exceptions import TooManyRedirects
+
+from haleasy import HALEasy, HALEasyLink, HALHttpClient, _clock, url_host
+
+
+class AsyncResponse(object):
+    """
+    The parts of an aiohttp response that HALEasy needs, with the body already read so that the connection can go back
+    into the pool straight away
+    """
+    history = ()  # AsyncHALHttpClient follows redirects itself, one request at a time
+
+    def __init__(self, url, status_code, headers, content, encoding=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding)
+
+    @classmethod
+    def from_cache_entry(cls, entry):
+        return cls(entry.url, entry.status_code, CIMultiDict(entry.headers), entry.content, entry.encoding)
+
+
+class AsyncHALHttpClient(HALHttpClient):
+    """
+    Follows the same rules as HALHttpClient, and uses its CACHE, PERMANENT_REDIRECTS and OBSERVERS in the same way, but
+    its request method is a coroutine and redirects are followed in a loop
+    """
+    @classmethod
+    def make_session(cls, headers=None, auth=None, pool_connections=None, pool_maxsize=None, pool_block=None,
+                     keep_alive=None):
+        """
+        Create an aiohttp.ClientSession with a pooled connector.  This must be called from a coroutine, and the caller
+        is responsible for closing the session when it is done with it
+        """
+        pool_connections = cls.POOL_CONNECTIONS if pool_connections is None else pool_connections
+        pool_maxsize = cls.POOL_MAXSIZE if pool_maxsize is None else pool_maxsize
+        keep_alive = cls.KEEP_ALIVE if keep_alive is None else keep_alive
+        connector = aiohttp.TCPConnector(limit=pool_connections * pool_maxsize,
+                                         limit_per_host=pool_maxsize,
+                                         force_close=not keep_alive)
+        return aiohttp.ClientSession(connector=connector,
+                                     headers=cls.DEFAULT_HEADERS if headers is None else headers,
+                                     auth=cls._make_auth(auth))
+
+    @classmethod
+    def _sends_credentials(cls, session, kwargs):
+        if session.auth or kwargs.get('auth') or len(session.cookie_jar) or kwargs.get('cookies'):
+            return True
+        headers = CIMultiDict(session.headers)
+        headers.update(kwargs.get('headers') or {})
+        return cls._sent_credentials(headers)
+
+    @staticmethod
+    def _make_auth(auth):
+        if isinstance(auth, tuple):
+            return aiohttp.BasicAuth(*auth)
+        return auth
+
+    @classmethod
+    async def request(cls, url, method=None, data=None, session=None, **kwargs):
+        """
+        Public facing request method, see HALHttpClient.request.  If no session is passed in, one is created for this
+        request and closed again afterwards
+        """
+        method = method or cls.DEFAULT_METHOD
+        if method not in cls.SUPPORTED_METHODS:
+            raise NotImplementedError('HTTP method %s is not implemented by this client' % method)
+
+        if 'auth' in kwargs:
+            kwargs['auth'] = cls._make_auth(kwargs['auth'])
+
+        if data is not None and not isinstance(data, str):
+            data = cls.JSON_CODEC.dumps(data)
+
+        if session:
+            return await cls._request(url, method, data, session, **kwargs)
+        async with cls.make_session(headers=kwargs.get('headers'), auth=kwargs.get('auth')) as session:
+            return await cls._request(url, method, data, session, **kwargs)
+
+    @classmethod
+    async def _request(cls, url, method, data, session, **kwargs):
+        """
+        Implements the same status code handling as HALHttpClient._request, following redirects in a loop of at most
+        MAX_REDIRECTS hops and raising RedirectLoopError if the same request comes round twice
+        """
+        visited = set()
+        for _ in range(cls.MAX_REDIRECTS + 1):
+            url = cls._follow_permanent_redirects(url)
+            cls._visit(visited, method, url)
+            resp = await cls._request_once(url, method, data, session, **kwargs)
+            cls._remember_permanent_redirects(resp)
+            next_request = cls._next_request(url, method, data, resp.status_code, resp.headers)
+            if next_request is None:
+                return resp
+            if cls.OBSERVERS:
+                cls.emit('redirect', url=url, location=next_request[0], status=resp.status_code, host=url_host(url))
+            url, method, data = next_request
+        raise TooManyRedirects('Exceeded %s redirects' % cls.MAX_REDIRECTS)
+
+    @classmethod
+    async def _request_once(cls, url, method, data, session, **kwargs):
+        """
+        Make a single request, answering it from CACHE or revalidating a cached response where possible, see
+        HALHttpClient._request_once
+        """
+        entry = None
+        request_kwargs = kwargs
+        use_cache = cls.CACHE is not None and method == 'GET' and not cls._sends_credentials(session, kwargs)
+        if use_cache:
+            entry = cls.CACHE.get(url)
+            if entry is not None:
+                if entry.is_fresh():
+                    cls.emit('cache_hit', url=url, host=url_host(url), revalidated=False)
+                    return AsyncResponse.from_cache_entry(entry)
+                headers = dict(kwargs.get('headers') or {})
+                headers.update(entry.validators())
+                request_kwargs = dict(kwargs, headers=headers)
+        observed = bool(cls.OBSERVERS)
+        if observed:
+            cls.emit('request_start', url=url, method=method, host=url_host(url))
+            start = _clock()
+        async with session.request(method, url, data=data, allow_redirects=False, **request_kwargs) as raw_resp:
+            resp = AsyncResponse(str(raw_resp.url),
+                                 raw_resp.status,
+                                 raw_resp.headers,
+                                 await raw_resp.read(),
+                                 raw_resp.get_encoding())
+            sent_headers = raw_resp.request_info.headers
+            if observed:
+                cls.emit('request_end', url=url, method=method, host=url_host(url), status=resp.status_code,
+                         elapsed=_clock() - start, bytes=len(resp.content))
+            raw_resp.raise_for_status()
+        if resp.status_code in cls.OK_CODES and use_cache:
+            cls._cache_response(url, resp, sent_headers)
+        elif resp.status_code == cls.NOT_MODIFIED_CODE and entry is not None:
+            entry.update(resp)
+            cls.CACHE.set(url, entry)
+            cls.emit('cache_hit', url=url, host=url_host(url), revalidated=True)
+            return AsyncResponse.from_cache_entry(entry)
+        return resp
+
+
+class AsyncHALEasyLink(HALEasyLink):
+    HTTP_CLIENT_CLASS = AsyncHALHttpClient
+
+    async def follow(self, method=None, data=None, **link_params):
+        if self.preview:
+            return self.preview
+        else:
+            return await self._fetch(method, data, link_params)
+
+    async def _fetch(self, method, data, link_params, allow_preview=True):
+        url = self.url(**link_params)
+        start = _clock()
+        is_get = self.http_client_class._is_get(method, data)
+        identity_map = self.http_client_class.IDENTITY_MAP
+        if identity_map is not None and is_get:
+            known = identity_map.get(url, self.session, allow_preview=allow_preview)
+            if known is not None:
+                return known
+        response = await self.http_client_class.request(url, method=method, data=data, session=self.session)
+        target = self._hal_class(response.url,
+                                 json_str=response.content,
+                                 preview=self.preview,
+                                 session=self.session,
+                                 http_client_class=self.http_client_class)
+        if identity_map is not None and is_get:
+            identity_map.add(target, url=url)
+        if self.http_client_class.OBSERVERS:
+            self.http_client_class.emit('follow', url=url, rel=self.rel, host=url_host(url), elapsed=_clock() - start)
+        return target
+
+
+class AsyncHALEasy(HALEasy):
+    """
+    A HALEasy whose links have a coroutine follow() method.  Create one from a URL with await AsyncHALEasy.fetch(url).
+    Indexing a preview with a property it lacks raises KeyError rather than fetching the full resource, use
+    await h.get(item) for that
+    """
+    HTTP_CLIENT_CLASS = AsyncHALHttpClient
+    LINK_CLASS = AsyncHALEasyLink
+
+    @classmethod
+    async def fetch(cls, url, method=None, data=None, session=None, http_client_class=None, **kwargs):
+        http_client_class = http_client_class or cls.HTTP_CLIENT_CLASS
+        if not session:
+            session = http_client_class.make_session(headers=kwargs.get('headers'), auth=kwargs.get('auth'))
+        response = await http_client_class.request(url, method=method, data=data, session=session, **kwargs)
+        h = cls(response.url, json_str=response.content, session=session, http_client_class=http_client_class)
+        if http_client_class.IDENTITY_MAP is not None and http_client_class._is_get(method, data):
+            http_client_class.IDENTITY_MAP.add(h, url=url)
+        return h
+
+    def from_url(self, url, method=None, data=None, http_client_class=None, session=None, **kwargs):
+        raise NotImplementedError('AsyncHALEasy cannot fetch a URL from its constructor, use await '
+                                  'AsyncHALEasy.fetch(url) instead')
+
+    def __getitem__(self, item):
+        return self._property(item)
+
+    async def get(self, item):
+        """
+        Like H[item], but if this is a preview which doesn't have the property then the full resource is fetched first
+        """
+        try:
+            return self._property(item)
+        except KeyError:
+            if self.is_preview:
+                target = await self.link(rel='self')._fetch(None, None, {}, allow_preview=False)
+                clone = self._snapshot()
+                self._update(target)
+                self.preview = clone
+                if self.http_client_class.IDENTITY_MAP is not None:
+                    self.http_client_class.IDENTITY_MAP.add(self)
+                return self[item]
+            else:
+                raise
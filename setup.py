@@ -7,7 +7,7 @@ from setuptools import setup
 setup(
     name = "HALEasy",
     version = "0.4.3",
-    py_modules = ['haleasy'],
+    py_modules = ['haleasy', 'haleasy_async'],
 
     # metadata for upload to PyPI
     author = "Matt Clark",
@@ -27,7 +27,12 @@ setup(
         'dougrain>=0.5.1',
         'requests>=2.5.1',
         'uritemplate>=0.6',
-        'six>=1.9.0'
-    ]
+        'six>=1.9.0',
+        'futures>=3.0.0; python_version < "3"'
+    ],
+    extras_require = {
+        'async': ['aiohttp>=3.0'],
+        'stream': ['ijson>=3.1']
+    }
 
 )
@@ -0,0 +1,119 @@
+from unittest import TestCase, skipIf
+import json
+try:
+    import asyncio
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+    from haleasy import IdentityMap, MemoryCache, MissingLocationError, RedirectLoopError
+    from haleasy_async import AsyncHALEasy, AsyncHALHttpClient
+except (ImportError, SyntaxError):
+    web = None
+
+
+@skipIf(web is None, 'aiohttp is not installed')
+class TestAsyncHALEasy(TestCase):
+    root = {
+        "_links": {
+            "self": {"href": "/api_root"},
+            "old": {"href": "/old"},
+            "thing1": {"href": "/thing1"}
+        },
+        "_embedded": {
+            "thing1": {"a": "b", "_links": {"self": {"href": "/thing1"}}}
+        },
+        "p1": 1
+    }
+    thing1 = {"a": "b", "k": "l", "_links": {"self": {"href": "/thing1"}}}
+
+    def run_with_server(self, coro_fn):
+        self.requested = []
+
+        @web.middleware
+        async def record_path(request, handler):
+            self.requested.append(request.path)
+            return await handler(request)
+
+        async def root_handler(request):
+            return web.Response(text=json.dumps(self.root), content_type='application/json',
+                                headers={'Cache-Control': 'max-age=60'})
+
+        async def thing1_handler(request):
+            return web.Response(text=json.dumps(self.thing1), content_type='application/json')
+
+        async def redirect_handler(request):
+            return web.Response(status=301, headers={'Location': '/thing1'})
+
+        async def loop_handler(request):
+            return web.Response(status=302, headers={'Location': '/loop'})
+
+        async def no_location_handler(request):
+            return web.Response(status=301)
+
+        app = web.Application(middlewares=[record_path])
+        app.router.add_get('/loop', loop_handler)
+        app.router.add_get('/no_location', no_location_handler)
+        app.router.add_get('/api_root', root_handler)
+        app.router.add_get('/thing1', thing1_handler)
+        app.router.add_get('/old', redirect_handler)
+
+        async def main():
+            async with TestServer(app) as server:
+                async with AsyncHALHttpClient.make_session() as session:
+                    return await coro_fn(str(server.make_url('')), session)
+        return asyncio.run(main())
+
+    def test_fetch_and_follow(self):
+        async def go(base, session):
+            h = await AsyncHALEasy.fetch(base + '/api_root', session=session)
+            self.assertEqual(h['p1'], 1)
+            h2 = await h.link(rel='old').follow()  # redirected to /thing1
+            self.assertEqual(h2['k'], 'l')
+            self.assertIs(h2.session, session)
+        self.run_with_server(go)
+
+    def test_preview_upgraded_by_get(self):
+        async def go(base, session):
+            h = await AsyncHALEasy.fetch(base + '/api_root', session=session)
+            preview = await h.link(rel='thing1').follow()
+            self.assertTrue(preview.is_preview)
+            self.assertRaises(KeyError, preview.__getitem__, 'k')
+            self.assertEqual(await preview.get('k'), 'l')
+            self.assertFalse(preview.is_preview)
+        self.run_with_server(go)
+
+    def test_redirect_loops_and_missing_locations(self):
+        async def go(base, session):
+            with self.assertRaises(RedirectLoopError):
+                await AsyncHALHttpClient.request(base + '/loop', session=session)
+            with self.assertRaises(MissingLocationError):
+                await AsyncHALHttpClient.request(base + '/no_location', session=session)
+        self.run_with_server(go)
+
+    def test_observers_cache_permanent_redirects_and_identity_map(self):
+        events = []
+
+        class Client(AsyncHALHttpClient):
+            OBSERVERS = (events.append,)
+            CACHE = MemoryCache()
+            PERMANENT_REDIRECTS = MemoryCache()
+            IDENTITY_MAP = IdentityMap()
+
+        async def go(base, session):
+            h = await AsyncHALEasy.fetch(base + '/api_root', session=session, http_client_class=Client)
+            await AsyncHALEasy.fetch(base + '/api_root', session=session, http_client_class=Client)  # cached
+            thing1 = await h.link(rel='old').follow()
+            self.assertIs(await h.link(rel='old').follow(), thing1)  # from the identity map
+            resp = await Client.request(base + '/old', session=session)  # straight to /thing1
+            self.assertEqual(resp.url, base + '/thing1')
+            return base
+        base = self.run_with_server(go)
+        self.assertEqual(self.requested, ['/api_root', '/old', '/thing1', '/thing1'])
+        self.assertEqual([e['event'] for e in events if e['event'] in ('cache_hit', 'redirect', 'follow')],
+                         ['cache_hit', 'redirect', 'follow'])
+        redirect = [e for e in events if e['event'] == 'redirect'][0]
+        self.assertEqual((redirect['url'], redirect['location'], redirect['status']),
+                         (base + '/old', base + '/thing1', 301))
+        self.assertEqual(len([e for e in events if e['event'] == 'request_end']), 4)
+
+    def test_constructor_cannot_fetch(self):
+        self.assertRaises(NotImplementedError, AsyncHALEasy, 'http://api.test_domain/api_root')
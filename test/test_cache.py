@@ -0,0 +1,128 @@
+from unittest import TestCase
+from haleasy import HALEasy, HALHttpClient, MemoryCache, DiskCache, CacheEntry
+import json
+import os
+import shutil
+import tempfile
+import responses
+
+
+class TestMemoryCache(TestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = MemoryCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(len(cache), 2)
+
+
+class TestDiskCache(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_entries_survive_a_new_cache_object(self):
+        DiskCache(self.directory).set('http://api.test_domain/a', {'x': 1})
+        self.assertEqual(DiskCache(self.directory).get('http://api.test_domain/a'), {'x': 1})
+        self.assertIsNone(DiskCache(self.directory).get('http://api.test_domain/b'))
+
+    def test_size_is_bounded(self):
+        cache = DiskCache(self.directory, max_bytes=3000)
+        for i in range(10):
+            cache.set('http://api.test_domain/%s' % i, 'x' * 1000)
+        self.assertTrue(len(cache) <= 3)
+        self.assertEqual(cache.get('http://api.test_domain/9'), 'x' * 1000)
+
+
+class TestCachingHttpClient(TestCase):
+    doc_json = json.dumps({'_links': {'self': {'href': '/api_root'}}, 'p1': 1})
+
+    def setUp(self):
+        class CachingHttpClient(HALHttpClient):
+            CACHE = MemoryCache()
+        self.client = CachingHttpClient
+        responses.reset()
+
+    @responses.activate
+    def test_fresh_response_served_from_cache(self):
+        responses.add(responses.GET, 'http://api.test_domain/api_root',
+                      body=self.doc_json, status=200, content_type='application/json',
+                      headers={'Cache-Control': 'max-age=60'})
+        HALEasy('http://api.test_domain/api_root', http_client_class=self.client)
+        h = HALEasy('http://api.test_domain/api_root', http_client_class=self.client)
+        self.assertEqual(h['p1'], 1)
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_stale_response_revalidated_and_304_is_a_hit(self):
+        responses.add(responses.GET, 'http://api.test_domain/api_root',
+                      body=self.doc_json, status=200, content_type='application/json',
+                      headers={'ETag': '"v1"', 'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        responses.add(responses.GET, 'http://api.test_domain/api_root', body='', status=304)
+        HALEasy('http://api.test_domain/api_root', http_client_class=self.client)
+        h = HALEasy('http://api.test_domain/api_root', http_client_class=self.client)
+        self.assertEqual(h['p1'], 1)
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(responses.calls[1].request.headers['If-None-Match'], '"v1"')
+        self.assertEqual(responses.calls[1].request.headers['If-Modified-Since'], 'Wed, 21 Oct 2015 07:28:00 GMT')
+
+    @responses.activate
+    def test_no_store_responses_are_not_cached(self):
+        responses.add(responses.GET, 'http://api.test_domain/api_root',
+                      body=self.doc_json, status=200, content_type='application/json',
+                      headers={'Cache-Control': 'no-store', 'ETag': '"v1"'})
+        HALEasy('http://api.test_domain/api_root', http_client_class=self.client)
+        self.assertIsNone(self.client.CACHE.get('http://api.test_domain/api_root'))
+
+    @responses.activate
+    def test_requests_with_credentials_are_not_cached(self):
+        responses.add(responses.GET, 'http://api.test_domain/api_root',
+                      body=self.doc_json, status=200, content_type='application/json',
+                      headers={'Cache-Control': 'max-age=60'})
+        alice = self.client.make_session(auth=('alice', 'secret'))
+        bob = self.client.make_session(headers={'Authorization': 'Bearer bob'})
+        HALEasy('http://api.test_domain/api_root', http_client_class=self.client, session=alice)
+        self.assertIsNone(self.client.CACHE.get('http://api.test_domain/api_root'))
+        HALEasy('http://api.test_domain/api_root', http_client_class=self.client)
+        HALEasy('http://api.test_domain/api_root', http_client_class=self.client, session=bob)
+        self.assertEqual(len(responses.calls), 3)
+        self.assertEqual(responses.calls[2].request.headers['Authorization'], 'Bearer bob')
+
+    @responses.activate
+    def test_disk_cache_does_not_store_the_request(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        class DiskCachingHttpClient(HALHttpClient):
+            CACHE = DiskCache(directory)
+        responses.add(responses.GET, 'http://api.test_domain/api_root',
+                      body=self.doc_json, status=200, content_type='application/json',
+                      headers={'Cache-Control': 'max-age=60'})
+        session = DiskCachingHttpClient.make_session(headers={'X-Api-Key': 'not-for-disk'})
+        HALEasy('http://api.test_domain/api_root', http_client_class=DiskCachingHttpClient, session=session)
+        h = HALEasy('http://api.test_domain/api_root', http_client_class=DiskCachingHttpClient)
+        self.assertEqual(h['p1'], 1)
+        self.assertEqual(len(responses.calls), 1)
+        for name in os.listdir(directory):
+            with open(os.path.join(directory, name), 'rb') as f:
+                self.assertNotIn(b'not-for-disk', f.read())
+
+    def test_cache_entry_freshness(self):
+        class FakeResponse(object):
+            status_code = 200
+            headers = {'Cache-Control': 'public, max-age=60', 'ETag': '"v1"'}
+            url = 'http://api.test_domain/api_root'
+            content = b'{}'
+            encoding = None
+        entry = CacheEntry(FakeResponse())
+        self.assertTrue(entry.is_fresh())
+        FakeResponse.headers = {'Cache-Control': 'no-cache', 'ETag': '"v2"'}
+        entry.update(FakeResponse())
+        self.assertFalse(entry.is_fresh())
+        self.assertEqual(entry.validators(), {'If-None-Match': '"v2"'})
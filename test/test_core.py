@@ -1,7 +1,15 @@
 from unittest import TestCase
-from haleasy import HALEasy, LinkNotFoundError
+from haleasy import HALDocLinkList, HALEasy, HALHttpClient, IdentityMap, LazyString, LinkNotFoundError, Prefetcher, \
+    Projection, extract_large_strings, follow_many
 import json
+import mmap
+import mock
 import responses
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests import Session
+from requests.exceptions import HTTPError
 
 
 class TestHalEasyPropertiesAndLinks(TestCase):
@@ -116,6 +124,41 @@ class TestHalEasyPropertiesAndLinks(TestCase):
             "href": "/link5path1",
         })
 
+    @responses.activate
+    def test_find_link_by_rel_and_href(self):
+        h = HALEasy('http://api.test_domain/api_root')
+        self.assertEqual(h.link(rel='other:link5', href='/link5path2')['name'], 'link5name2')
+        self.assertEqual(h.link(rel='other:link5', href='/link5path2', name='link5name2')['name'], 'link5name2')
+        self.assertEqual(h.links(rel='other:link5', href='/link5path2', name='link5name1'), [])
+        self.assertEqual(h.links(rel='link1', href='/link5path2'), [])
+        self.assertEqual(h.link(href='/link5path2')['name'], 'link5name2')
+
+    @responses.activate
+    def test_curie_rels_found_by_expanded_and_unexpanded_names(self):
+        h = HALEasy('http://api.test_domain/api_root')
+        self.assertIs(h.link(rel='ex:link2'), h.link(rel='http://ex/link2'))
+
+    def test_link_attributes_read_from_link_json(self):
+        h = HALEasy('http://ex.com/api_root', json_str=self.sample_hal_root_json)
+        l = h.link(rel='link4')
+        self.assertEqual(l.href, '/link4path/{var}')
+        self.assertTrue(l.is_templated)
+        self.assertEqual(l.variables, ['var'])
+        self.assertEqual(l.template, 'http://ex.com/link4path/{var}')
+        self.assertEqual(l.url(var='x'), 'http://ex.com/link4path/x')
+        self.assertFalse(hasattr(l, 'name'))
+        l3 = h.link(rel='other:link3')
+        self.assertEqual(l3.name, 'thing3')
+        self.assertFalse(l3.is_templated)
+        self.assertEqual(l3.variables, [])
+
+    def test_compact_representation(self):
+        h = HALEasy('http://ex.com/api_root', json_str=self.sample_hal_root_json)
+        self.assertFalse(hasattr(h, '__dict__'))
+        h2 = HALEasy('http://ex.com/api_root', json_str=self.sample_hal_root_json)
+        self.assertIs(h.link(rel='link1').rel, h2.link(rel='link1').rel)
+        self.assertIs(h.link(rel='link1').base_uri, h2.link(rel='link1').base_uri)
+
     @responses.activate
     def test_find_named_rel_by_name(self):
         h = HALEasy('http://api.test_domain/api_root')
@@ -143,4 +186,495 @@ class TestHalEasyPropertiesAndLinks(TestCase):
         h2 = h.link(rel="link4").follow(var="foo")
         self.assertEqual(h2.fetched_from, 'http://api.test_domain/link4path/foo')
 
+    @responses.activate
+    def test_session_is_shared_across_follows(self):
+        responses.add(responses.GET, 'http://api.test_domain/link1path',
+                      body=self.sample_hal_root_json, status=200,
+                      content_type='application/json')
+        h = HALEasy('http://api.test_domain/api_root')
+        h2 = h.link(rel='link1').follow()
+        self.assertIsNotNone(h.session)
+        self.assertIs(h2.session, h.session)
+        self.assertIs(h2.link(rel='link1').session, h.session)
+
+    @responses.activate
+    def test_session_passed_in_is_used_for_follows(self):
+        responses.add(responses.GET, 'http://api.test_domain/link1path',
+                      body=self.sample_hal_root_json, status=200,
+                      content_type='application/json')
+        mysession = Session()
+        h = HALEasy('http://api.test_domain/api_root', session=mysession)
+        self.assertIs(h.link(rel='link1').follow().session, mysession)
+
+
+
+
+class TestFollowMany(TestCase):
+    collection = {
+        "_links": {
+            "self": {"href": "/items"},
+            "item": [{"href": "/items/%s" % i} for i in range(20)]
+        }
+    }
+
+    def setUp(self):
+        responses.reset()
+        responses.add(responses.GET, 'http://api.test_domain/items',
+                      body=json.dumps(self.collection), status=200,
+                      content_type='application/json')
+        for i in range(20):
+            if i == 7:
+                responses.add(responses.GET, 'http://api.test_domain/items/7', body='', status=404)
+                continue
+            responses.add(responses.GET, 'http://api.test_domain/items/%s' % i,
+                          body=json.dumps({"_links": {"self": {"href": "/items/%s" % i}}, "n": i}), status=200,
+                          content_type='application/json')
+
+    @responses.activate
+    def test_results_in_link_order_with_errors_in_place(self):
+        h = HALEasy('http://api.test_domain/items')
+        results = h.follow_all(rel='item', max_workers=4)
+        self.assertEqual(len(results), 20)
+        for i, result in enumerate(results):
+            if i == 7:
+                self.assertIsInstance(result, HTTPError)
+            else:
+                self.assertEqual(result['n'], i)
+                self.assertIs(result.session, h.session)
+
+    @responses.activate
+    def test_errors_can_be_raised(self):
+        h = HALEasy('http://api.test_domain/items')
+        self.assertRaises(HTTPError, follow_many, h.links(rel='item'), return_exceptions=False)
+
+    def test_no_links(self):
+        self.assertEqual(follow_many([]), [])
+
+
+class TestPagination(TestCase):
+    def setUp(self):
+        responses.reset()
+        for page in range(1, 4):
+            doc = {
+                "_links": {
+                    "self": {"href": "/items?page=%s" % page},
+                    "page": {"href": "/items{?page}", "templated": True}
+                },
+                "_embedded": {
+                    "item": [{"_links": {"self": {"href": "/items/%s" % n}}, "n": n}
+                             for n in range(page * 2 - 1, page * 2 + 1)]
+                }
+            }
+            if page < 3:
+                doc["_links"]["next"] = {"href": "/items?page=%s" % (page + 1)}
+            responses.add(responses.GET, 'http://api.test_domain/items?page=%s' % page,
+                          body=json.dumps(doc), status=200,
+                          content_type='application/json')
+        responses.add(responses.GET, 'http://api.test_domain/items?page=4', body='', status=404)
+
+    @responses.activate
+    def test_iter_pages(self):
+        for prefetch in (True, False):
+            h = HALEasy('http://api.test_domain/items?page=1')
+            pages = list(h.iter_pages(prefetch=prefetch))
+            self.assertEqual([p.fetched_from for p in pages],
+                             ['http://api.test_domain/items?page=%s' % n for n in range(1, 4)])
+
+    @responses.activate
+    def test_iter_pages_builds_each_link_list_once(self):
+        h = HALEasy('http://api.test_domain/items?page=1')
+        built = []
+        build = HALDocLinkList.__init__
+
+        def counting_build(link_list, doc, *args, **kwargs):
+            built.append(doc)
+            build(link_list, doc, *args, **kwargs)
+        with mock.patch.object(HALDocLinkList, '__init__', counting_build):
+            for page in h.iter_pages():
+                page.links(rel='item')
+        self.assertEqual(len(built), len(set(id(doc) for doc in built)))
+
+    @responses.activate
+    def test_link_list_built_once_by_concurrent_threads(self):
+        h = HALEasy('http://api.test_domain/items?page=1')
+        built = []
+        build = HALDocLinkList.__init__
+
+        def slow_build(link_list, doc, *args, **kwargs):
+            built.append(doc)
+            time.sleep(0.05)  # give the other threads time to find the link list missing
+            build(link_list, doc, *args, **kwargs)
+        with mock.patch.object(HALDocLinkList, '__init__', slow_build):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                link_lists = list(executor.map(lambda _: h._get_link_list(), range(4)))
+        self.assertEqual(len([doc for doc in built if doc is h.doc]), 1)
+        self.assertTrue(all(link_list is link_lists[0] for link_list in link_lists))
+
+    @responses.activate
+    def test_iter_items(self):
+        h = HALEasy('http://api.test_domain/items?page=1')
+        self.assertEqual([item['n'] for item in h.iter_items('item')], [1, 2, 3, 4, 5, 6])
+
+    @responses.activate
+    def test_iter_template_pages_stops_at_404(self):
+        h = HALEasy('http://api.test_domain/items?page=1')
+        pages = list(h.iter_template_pages('page', max_workers=2))
+        self.assertEqual([p.fetched_from for p in pages],
+                         ['http://api.test_domain/items?page=%s' % n for n in range(1, 4)])
+
+    @responses.activate
+    def test_iter_template_pages_with_stop(self):
+        h = HALEasy('http://api.test_domain/items?page=1')
+        pages = list(h.iter_template_pages('page', start=2, stop=4))
+        self.assertEqual([p.fetched_from for p in pages],
+                         ['http://api.test_domain/items?page=2', 'http://api.test_domain/items?page=3'])
+
+
+class TestIdentityMap(TestCase):
+    root = {
+        "_links": {
+            "self": {"href": "/api_root"},
+            "owner": {"href": "/users/fred"},
+            "author": {"href": "/users/fred"},
+            "editor": {"href": "/users/jim"}
+        },
+        "_embedded": {
+            "editor": {"_links": {"self": {"href": "/users/jim"}}, "name": "Jim"}
+        }
+    }
+
+    def setUp(self):
+        class IdentityMapHttpClient(HALHttpClient):
+            IDENTITY_MAP = IdentityMap(ttl=60)
+        self.client = IdentityMapHttpClient
+        responses.reset()
+        responses.add(responses.GET, 'http://api.test_domain/api_root',
+                      body=json.dumps(self.root), status=200,
+                      content_type='application/json')
+        for name in ('fred', 'jim'):
+            responses.add(responses.GET, 'http://api.test_domain/users/%s' % name,
+                          body=json.dumps({"_links": {"self": {"href": "/users/%s" % name}},
+                                           "name": name.title(), "email": name + "@ex"}), status=200,
+                          content_type='application/json')
+
+    @responses.activate
+    def test_same_resource_fetched_once(self):
+        h = HALEasy('http://api.test_domain/api_root', http_client_class=self.client)
+        owner = h.link(rel='owner').follow()
+        self.assertIs(h.link(rel='author').follow(), owner)
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_only_get_responses_are_remembered(self):
+        responses.add(responses.POST, 'http://api.test_domain/users/fred',
+                      body=json.dumps({"_links": {"self": {"href": "/users/fred"}}, "updated": True}), status=200,
+                      content_type='application/json')
+        responses.add(responses.POST, 'http://api.test_domain/users/jim',
+                      body=json.dumps({"_links": {"self": {"href": "/users/jim"}}, "updated": True}), status=200,
+                      content_type='application/json')
+        h = HALEasy('http://api.test_domain/api_root', http_client_class=self.client)
+        self.assertTrue(h.link(rel='owner').follow(method='POST', data={'name': 'Fred'})['updated'])
+        self.assertEqual(h.link(rel='author').follow()['email'], 'fred@ex')
+        jim = HALEasy('http://api.test_domain/users/jim', method='POST', http_client_class=self.client)
+        self.assertIsNone(self.client.IDENTITY_MAP.get('http://api.test_domain/users/jim', jim.session))
+
+    @responses.activate
+    def test_embedded_resources_are_remembered_and_upgraded(self):
+        h = HALEasy('http://api.test_domain/api_root', http_client_class=self.client)
+        h.links()
+        jim = self.client.IDENTITY_MAP.get('http://api.test_domain/users/jim', h.session)
+        self.assertTrue(jim.is_preview)
+        self.assertEqual(jim['email'], 'jim@ex')  # fetches the full resource
+        self.assertFalse(self.client.IDENTITY_MAP.get('http://api.test_domain/users/jim', h.session).is_preview)
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_documents_are_only_handed_to_their_own_session(self):
+        alice = HALEasy('http://api.test_domain/api_root', http_client_class=self.client, auth=('alice', 'x'))
+        alice_owner = alice.link(rel='owner').follow()
+        bob = HALEasy('http://api.test_domain/api_root', http_client_class=self.client, auth=('bob', 'y'))
+        bob_owner = bob.link(rel='owner').follow()
+        self.assertIsNot(bob_owner, alice_owner)
+        self.assertIs(bob_owner.session, bob.session)
+        self.assertEqual(len(responses.calls), 4)
+
+    @responses.activate
+    def test_redirected_resources_are_remembered_by_requested_url(self):
+        responses.add(responses.GET, 'http://api.test_domain/me', status=302,
+                      headers={'Location': 'http://api.test_domain/users/fred'})
+        h = HALEasy('http://api.test_domain/api_root', json_str=json.dumps({"_links": {"me": {"href": "/me"}}}),
+                    session=self.client.make_session(), http_client_class=self.client)
+        me = h.link(rel='me').follow()
+        self.assertIs(h.link(rel='me').follow(), me)
+        self.assertIs(self.client.IDENTITY_MAP.get('http://api.test_domain/users/fred', h.session), me)
+        self.assertEqual(len(responses.calls), 2)  # the redirect and where it led
+
+    def test_entries_expire(self):
+        identity_map = IdentityMap(ttl=-1)
+        identity_map.add(HALEasy('http://api.test_domain/x', json_str='{"a": 1}'))
+        self.assertIsNone(identity_map.get('http://api.test_domain/x'))
+
+    def test_preview_does_not_replace_full_document(self):
+        identity_map = IdentityMap()
+        full = HALEasy('http://api.test_domain/x', json_str='{"a": 1}')
+        identity_map.add(full)
+        identity_map.add(HALEasy('http://api.test_domain/x', json_str='{"a": 2}', is_preview=True))
+        self.assertIs(identity_map.get('http://api.test_domain/x'), full)
+        self.assertIsNone(identity_map.get('http://api.test_domain/y'))
+
+
+class TestPrefetcher(TestCase):
+    root = {
+        "_links": {
+            "self": {"href": "/api_root"},
+            "curies": [{"name": "ex", "href": "http://rels.test_domain/{rel}", "templated": True}],
+            "next": {"href": "/page2"},
+            "ex:owner": {"href": "/users/fred"},
+            "editor": {"href": "/users/jim"},
+            "search": {"href": "/search{?q}", "templated": True}
+        }
+    }
+
+    def setUp(self):
+        class PrefetchingHALEasy(HALEasy):
+            PREFETCHER = Prefetcher(rels=('next', 'http://rels.test_domain/owner', 'search'), max_workers=2)
+        self.hal_class = PrefetchingHALEasy
+        responses.reset()
+        responses.add(responses.GET, 'http://api.test_domain/api_root',
+                      body=json.dumps(self.root), status=200,
+                      content_type='application/json')
+        responses.add(responses.GET, 'http://api.test_domain/page2',
+                      body=json.dumps({"_links": {"self": {"href": "/page2"}, "next": {"href": "/page3"}}}),
+                      status=200, content_type='application/json')
+        for path in ('/page3', '/users/fred', '/users/jim'):
+            responses.add(responses.GET, 'http://api.test_domain' + path,
+                          body=json.dumps({"_links": {"self": {"href": path}}}), status=200,
+                          content_type='application/json')
+
+    def tearDown(self):
+        self.hal_class.PREFETCHER.close()
+
+    def requested(self):
+        return sorted(call.request.url for call in responses.calls)
+
+    @responses.activate
+    def test_likely_rels_are_fetched_in_the_background(self):
+        h = self.hal_class('http://api.test_domain/api_root')
+        page2 = h.link(rel='next').follow()
+        owner = h.link(rel='ex:owner').follow()
+        self.assertEqual(page2.link(rel='self').href, '/page2')
+        self.assertEqual(owner.link(rel='self').href, '/users/fred')
+        # page3 is prefetched once page2 is used, and nothing is fetched twice.  Templated links aren't prefetched
+        self.assertIsNotNone(self.hal_class.PREFETCHER.take('http://api.test_domain/page3', h.session))
+        self.assertEqual(self.requested(), ['http://api.test_domain/api_root',
+                                            'http://api.test_domain/page2',
+                                            'http://api.test_domain/page3',
+                                            'http://api.test_domain/users/fred'])
+
+    @responses.activate
+    def test_prefetched_documents_are_not_prefetched_from(self):
+        h = self.hal_class('http://api.test_domain/api_root')
+        self.assertIsNotNone(self.hal_class.PREFETCHER.take('http://api.test_domain/page2', h.session))
+        self.hal_class.PREFETCHER.close()
+        self.assertNotIn('http://api.test_domain/page3', self.requested())
+
+    @responses.activate
+    def test_unused_documents_are_discarded(self):
+        prefetcher = self.hal_class.PREFETCHER
+        prefetcher.maxsize = 1
+        h = self.hal_class('http://api.test_domain/api_root')
+        self.assertEqual(len(prefetcher), 1)
+        prefetcher.cancel()
+        self.assertEqual(len(prefetcher), 0)
+        self.assertIsNone(prefetcher.take('http://api.test_domain/users/fred', h.session))
+        self.assertEqual(h.link(rel='ex:owner').follow().link(rel='self').href, '/users/fred')
+
+    @responses.activate
+    def test_failed_prefetch_is_retried_by_follow(self):
+        responses.replace(responses.GET, 'http://api.test_domain/page2', status=503)
+        h = self.hal_class('http://api.test_domain/api_root')
+        with self.assertRaises(HTTPError):
+            h.link(rel='next').follow()
+
+    @responses.activate
+    def test_documents_are_only_handed_to_their_own_session(self):
+        alice = self.hal_class('http://api.test_domain/api_root', auth=('alice', 'x'))
+        bob = self.hal_class('http://api.test_domain/api_root', auth=('bob', 'y'))
+        owner = bob.link(rel='ex:owner').follow()
+        self.assertIs(owner.session, bob.session)
+        self.assertIsNotNone(self.hal_class.PREFETCHER.take('http://api.test_domain/users/fred', alice.session))
+
+    @responses.activate
+    def test_expired_documents_are_discarded(self):
+        prefetcher = self.hal_class.PREFETCHER
+        prefetcher.ttl = -1
+        h = self.hal_class('http://api.test_domain/api_root')
+        self.assertIsNone(prefetcher.take('http://api.test_domain/page2', h.session))
+        self.assertEqual(len(prefetcher), 0)
+
+
+class TestSnapshots(TestCase):
+    doc = {
+        "_links": {
+            "self": {"href": "/api_root"},
+            "curies": [{"name": "ex", "href": "http://rels.test_domain/{rel}", "templated": True}],
+            "ex:owner": {"href": "/users/fred"}
+        },
+        "_embedded": {
+            "item": [{"_links": {"self": {"href": "/items/1"}, "ex:part": {"href": "/parts/1"}}, "name": "one"}]
+        },
+        "title": "root"
+    }
+
+    def setUp(self):
+        self.h = HALEasy('http://api.test_domain/api_root', json_str=json.dumps(self.doc),
+                         session=HALHttpClient.make_session())
+
+    def test_round_trip(self):
+        loaded = HALEasy.load(self.h.dump())
+        self.assertEqual(loaded.fetched_from, 'http://api.test_domain/api_root')
+        self.assertEqual(loaded['title'], 'root')
+        self.assertEqual(loaded.link(rel='ex:owner').url(), 'http://api.test_domain/users/fred')
+        item = loaded.link(rel='item').preview
+        self.assertEqual(item['name'], 'one')
+        self.assertEqual(item.link(rel='ex:part').url(), 'http://api.test_domain/parts/1')
+
+    def test_link_lists_are_saved_built(self):
+        loaded = HALEasy.load(self.h.dump())
+        self.assertIsNotNone(loaded._link_list)
+        self.assertIsNotNone(loaded.link(rel='item').preview._link_list)
+
+    def test_sessions_are_not_saved(self):
+        session = Session()
+        loaded = HALEasy.load(self.h.dump(), session=session)
+        self.assertIs(loaded.session, session)
+        self.assertIs(loaded.link(rel='ex:owner').session, session)
+        self.assertIs(loaded.link(rel='item').preview.session, session)
+        self.assertIsNone(HALEasy.load(self.h.dump()).session)
+
+    def test_load_from_file_and_mmap(self):
+        with tempfile.TemporaryFile() as f:
+            self.h.dump(f)
+            f.seek(0)
+            self.assertEqual(HALEasy.load(f)['title'], 'root')
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.assertEqual(HALEasy.load(mapped)['title'], 'root')
+            mapped.close()
+
+    def test_not_a_snapshot(self):
+        with self.assertRaises(ValueError):
+            HALEasy.load(b'{"title": "root"}')
+
+
+class TestProjection(TestCase):
+    doc = {
+        "_links": {
+            "self": {"href": "/api_root"},
+            "curies": [{"name": "ex", "href": "http://rels.test_domain/{rel}", "templated": True}],
+            "ex:owner": {"href": "/users/fred"},
+            "http://rels.test_domain/editor": {"href": "/users/jim"},
+            "next": {"href": "/page2"}
+        },
+        "_embedded": {
+            "item": [{"_links": {"self": {"href": "/items/1"}}, "name": "one"}],
+            "ex:comment": {"_links": {"self": {"href": "/comments/1"}}}
+        },
+        "title": "root",
+        "count": 3,
+        "blob": "x" * 1000
+    }
+
+    def project(self, **kwargs):
+        return HALEasy('http://api.test_domain/api_root', json_str=json.dumps(self.doc),
+                       projection=Projection(**kwargs))
+
+    def test_properties(self):
+        h = self.project(properties=['title', 'count'])
+        self.assertEqual(h.properties(), {'title': 'root', 'count': 3})
+        self.assertEqual(len(h.links(rel='next')), 1)
+
+    def test_rels_as_curies_or_in_full(self):
+        h = self.project(rels=['http://rels.test_domain/owner', 'ex:editor'], embedded=['ex:comment'])
+        self.assertEqual(sorted(link.rel for link in h.links()),
+                         ['http://rels.test_domain/comment', 'http://rels.test_domain/editor',
+                          'http://rels.test_domain/owner', 'self'])
+        self.assertEqual(h['blob'], 'x' * 1000)
+
+    def test_nothing_is_built_for_dropped_parts(self):
+        h = self.project(properties=[], rels=[], embedded=[])
+        self.assertEqual(h.doc.o, {'_links': {'self': self.doc['_links']['self'],
+                                              'curies': self.doc['_links']['curies']},
+                                   '_embedded': {}})
+        self.assertEqual(self.doc['title'], 'root')
+
+    @responses.activate
+    def test_projected_documents_are_not_remembered(self):
+        class IdentityMapHttpClient(HALHttpClient):
+            IDENTITY_MAP = IdentityMap()
+        responses.add(responses.GET, 'http://api.test_domain/api_root', body=json.dumps(self.doc), status=200,
+                      content_type='application/json')
+        h = HALEasy('http://api.test_domain/api_root', http_client_class=IdentityMapHttpClient,
+                    projection=Projection(properties=['title']))
+        self.assertEqual(h.properties(), {'title': 'root'})
+        self.assertIsNone(IdentityMapHttpClient.IDENTITY_MAP.get('http://api.test_domain/api_root', h.session))
+
+
+class LazyHALEasy(HALEasy):
+    LAZY_STRING_THRESHOLD = 100
+
+
+class TestLazyStrings(TestCase):
+    blob = u'ab\\"cé' * 100
+    doc = {
+        "_links": {"self": {"href": "/doc"}},
+        "_embedded": {"item": {"_links": {"self": {"href": "/item"}}, "attachment": blob}},
+        "blob": blob,
+        "nested": {"list": [blob, "short"]},
+        "title": "doc",
+        blob: "a long key"
+    }
+
+    def setUp(self):
+        self.hal_class = LazyHALEasy
+        self.body = json.dumps(self.doc).encode('utf-8')
+
+    def test_large_strings_are_left_in_the_body(self):
+        body, lazy_strings = extract_large_strings(self.body, 100)
+        self.assertEqual(len(lazy_strings), 3)
+        self.assertLess(len(body), len(self.body) / 2)
+        for lazy_string in lazy_strings.values():
+            self.assertEqual(lazy_string.decode(), self.blob)
+
+    def test_values_are_decoded_when_read(self):
+        h = self.hal_class('http://api.test_domain/doc', json_str=self.body)
+        self.assertIsInstance(h.doc.o['blob'], LazyString)
+        self.assertEqual(h['blob'], self.blob)
+        self.assertEqual(h.doc.o['blob'], self.blob)  # only decoded once
+        self.assertEqual(h['nested'], {'list': [self.blob, 'short']})
+        self.assertEqual(h[self.blob], 'a long key')
+        self.assertEqual(h.link(rel='item').preview['attachment'], self.blob)
+
+    def test_links_are_never_lazy(self):
+        long_path = '/items?' + 'x' * 100
+        doc = {
+            "_links": {"self": {"href": "/doc"}, "next": {"href": long_path, "title": "t" * 100}},
+            "_embedded": {"item": {"_links": {"self": {"href": long_path + '&embedded'}}, "attachment": self.blob}}
+        }
+        h = self.hal_class('http://api.test_domain/doc', json_str=json.dumps(doc).encode('utf-8'))
+        self.assertEqual(h.link(rel='next').url(), 'http://api.test_domain' + long_path)
+        self.assertEqual(h.link(rel='next').title, 't' * 100)
+        item = h.link(rel='item')
+        self.assertEqual(item.url(), 'http://api.test_domain' + long_path + '&embedded')
+        self.assertIsInstance(item.preview.doc.o['attachment'], LazyString)
+
+    def test_properties(self):
+        h = self.hal_class('http://api.test_domain/doc', json_str=self.body)
+        self.assertEqual(h.properties(), dict((k, v) for k, v in self.doc.items() if not k.startswith('_')))
+
+    def test_snapshots(self):
+        h = HALEasy.load(self.hal_class('http://api.test_domain/doc', json_str=self.body).dump())
+        self.assertEqual(h['blob'], self.blob)
 
+    def test_off_by_default(self):
+        h = HALEasy('http://api.test_domain/doc', json_str=self.body)
+        self.assertEqual(h.doc.o['blob'], self.blob)
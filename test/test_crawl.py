@@ -0,0 +1,110 @@
+from unittest import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from haleasy import HALEasy, crawl, _crawl_fetch, _crawl_sessions
+from requests.auth import HTTPBasicAuth, _basic_auth_str
+from requests.exceptions import HTTPError
+import copy
+from six.moves import BaseHTTPServer, socketserver
+import json
+import responses
+import threading
+
+
+def resource(path, **links):
+    links['self'] = {'href': path}
+    return {"_links": links, "path": path}
+
+
+GRAPH = {
+    '/root': resource('/root',
+                      item=[{'href': '/a'}, {'href': '/b'}],
+                      search={'href': '/search{?q}', 'templated': True},
+                      help={'href': '/help'}),
+    '/a': resource('/a', item={'href': '/c'}, up={'href': '/root'}),
+    '/b': resource('/b', item=[{'href': '/c'}, {'href': '/a-alias'}]),
+    '/a-alias': resource('/a'),  # another URL for /a
+    '/c': resource('/c', item={'href': '/d'}),
+    '/d': resource('/d'),
+    '/help': resource('/help'),
+}
+
+
+class TestCrawl(TestCase):
+    def setUp(self):
+        responses.reset()
+        for path, doc in GRAPH.items():
+            responses.add(responses.GET, 'http://api.test_domain' + path, body=json.dumps(doc), status=200,
+                          content_type='application/json')
+
+    def crawl(self, **kwargs):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return list(crawl('http://api.test_domain/root', executor=executor, max_workers=2, **kwargs))
+
+    @responses.activate
+    def test_every_resource_is_fetched_once(self):
+        docs = self.crawl()
+        self.assertEqual(sorted(doc['path'] for doc in docs), ['/a', '/b', '/c', '/d', '/help', '/root'])
+        self.assertEqual(len(responses.calls), 7)  # including /a-alias, which turns out to be /a
+        self.assertTrue(all(isinstance(doc, HALEasy) for doc in docs))
+
+    @responses.activate
+    def test_rels_and_depth(self):
+        docs = self.crawl(rels=['item'], max_depth=2)
+        self.assertEqual(docs[0]['path'], '/root')
+        self.assertEqual(sorted(doc['path'] for doc in docs), ['/a', '/b', '/c', '/root'])
+
+    @responses.activate
+    def test_errors(self):
+        responses.replace(responses.GET, 'http://api.test_domain/help', status=500)
+        results = self.crawl()
+        self.assertEqual(len([r for r in results if isinstance(r, HTTPError)]), 1)
+        with self.assertRaises(HTTPError):
+            self.crawl(return_exceptions=False)
+
+
+    @responses.activate
+    def test_worker_session_reused_for_copies_of_the_same_kwargs(self):
+        _crawl_sessions.clear()
+        kwargs = {'auth': HTTPBasicAuth('u', 'p')}
+        for path in ('/root', '/a', '/b'):
+            # a worker process gets a new copy of kwargs for every fetch
+            _crawl_fetch(HALEasy, 'http://api.test_domain' + path, None, copy.deepcopy(kwargs))
+        self.assertEqual(len(_crawl_sessions), 1)
+        _crawl_fetch(HALEasy, 'http://api.test_domain/c', None, {'auth': HTTPBasicAuth('v', 'q')})
+        self.assertEqual(len(_crawl_sessions), 2)
+        self.assertEqual(responses.calls[-1].request.headers['Authorization'], _basic_auth_str('v', 'q'))
+
+
+class GraphHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps(GRAPH[self.path]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class GraphServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class TestCrawlProcesses(TestCase):
+    def setUp(self):
+        self.server = GraphServer(('127.0.0.1', 0), GraphHandler)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_crawl_in_worker_processes(self):
+        root = 'http://127.0.0.1:%s/root' % self.server.server_address[1]
+        docs = list(crawl(root, rels=['item'], max_workers=2))
+        self.assertEqual(sorted(doc['path'] for doc in docs), ['/a', '/b', '/c', '/d', '/root'])
+        self.assertEqual(docs[0].link(rel='item').url(), 'http://127.0.0.1:%s/a' % self.server.server_address[1])
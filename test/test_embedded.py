@@ -2,6 +2,7 @@ from unittest import TestCase
 from haleasy import HALEasy
 import json
 import responses
+import mock
 
 class TestHaleasyEmbedded(TestCase):
     sample_hal_root = {
@@ -89,6 +90,23 @@ class TestHaleasyEmbedded(TestCase):
         expected_count = 5  # 1 self link, 1 direct link, 3 embedded resources
         self.assertEqual(len(list(h.links())), expected_count)
 
+    def test_links_and_previews_built_on_first_use(self):
+        h = HALEasy('http://api.test_domain/api_root', json_str=self.sample_hal_root_json)
+        self.assertEqual(h['a'], 'b')
+        self.assertIsNone(h._link_list)
+        self.assertEqual(len(h.links()), 5)
+        self.assertIsNotNone(h._link_list)
+
+    def test_embedded_resources_are_not_reparsed(self):
+        h = HALEasy('http://api.test_domain/api_root', json_str=self.sample_hal_root_json)
+        with mock.patch('haleasy.json') as json_module:
+            preview = h.link(rel='sample_hal_rel1').follow()
+        self.assertFalse(json_module.dumps.called)
+        self.assertFalse(json_module.loads.called)
+        self.assertEqual(preview['c'], 'd')
+        self.assertEqual(preview.fetched_from, 'http://api.test_domain/thing1')
+        self.assertIs(preview.doc.as_object(), h.doc.as_object()['_embedded']['sample_hal_rel1'])
+
     @responses.activate
     def test_links_have_preview_attributes(self):
         h = HALEasy('http://api.test_domain/api_root')
@@ -116,10 +134,15 @@ class TestHaleasyEmbedded(TestCase):
     def test_full_object_fetched_when_preview_lacks_property(self):
         h = HALEasy('http://api.test_domain/api_root')
         h1 = h.link(rel="sample_hal_rel1").follow()
-        self.assertEqual(h1['k'], 'l')  # 'k' not in embedded resource properties, HTTP GET performed
+        preview_doc = h1.doc
+        with mock.patch('haleasy.copy.deepcopy') as deepcopy:
+            self.assertEqual(h1['k'], 'l')  # 'k' not in embedded resource properties, HTTP GET performed
+        self.assertFalse(deepcopy.called)
+        self.assertIs(h1.preview.doc, preview_doc)  # the preview snapshot shares the original document
         self.assertFalse(h1.is_preview) # h1 is now not an embedded resource
         self.assertEqual(h1['i'], 'x')  # value of h1['i'] has changed to 'x'
         self.assertEqual(h1.preview['i'], 'j')  # old value of h1['i'] available here
+        self.assertIs(h1.preview.session, h.session)  # the session is shared, not copied
 
     @responses.activate
     def test_embedded_rel_with_multiple_objects(self):
@@ -1,7 +1,12 @@
 from unittest import TestCase
-from haleasy import HALHttpClient
+from concurrent.futures import ThreadPoolExecutor
+from haleasy import HALEasy, HALHttpClient, MemoryCache, MissingLocationError, RedirectLoopError
 from requests import Session
-from requests.auth import HTTPDigestAuth
+from requests.exceptions import TooManyRedirects
+import json
+import responses
+import time
+from requests.auth import HTTPBasicAuth, HTTPDigestAuth
 
 
 class TestHeaders(TestCase):
@@ -15,6 +20,11 @@ class TestHeaders(TestCase):
         session = TestHttpClient.request('any')
         self.assertEqual(session.headers['content-type'], 'application/json')  # note the change of case
 
+    def test_empty_headers_mean_no_default_headers(self):
+        session = HALHttpClient.make_session(headers={})
+        self.assertNotIn('Content-Type', session.headers)
+        self.assertNotEqual(session.headers.get('Accept'), 'application/json')
+
 
 class TestHalHttpClientSession(TestCase):
     def test_invalid_methods_rejected(self):
@@ -89,3 +99,157 @@ class TestHTTPAuth(TestCase):
         httpclientsession = TestHttpClient.request('http://api.test_domain/api_root', session=mysession)
         self.assertEqual(httpclientsession.auth, mysession.auth)
 
+
+
+class TestConnectionPool(TestCase):
+    def test_session_has_pooled_adapters(self):
+        class TestHttpClient(HALHttpClient):
+            POOL_CONNECTIONS = 3
+            POOL_MAXSIZE = 7
+
+        session = TestHttpClient.make_session()
+        for prefix in ('http://', 'https://'):
+            adapter = session.get_adapter(prefix + 'api.test_domain/')
+            self.assertEqual(adapter._pool_connections, 3)
+            self.assertEqual(adapter._pool_maxsize, 7)
+
+    def test_pool_settings_can_be_overridden_per_session(self):
+        session = HALHttpClient.make_session(pool_maxsize=20)
+        self.assertEqual(session.get_adapter('http://api.test_domain/')._pool_maxsize, 20)
+
+    def test_keep_alive_can_be_disabled(self):
+        self.assertNotEqual(HALHttpClient.make_session().headers.get('Connection'), 'close')
+        self.assertEqual(HALHttpClient.make_session(keep_alive=False).headers['Connection'], 'close')
+
+
+class TestRedirects(TestCase):
+    def setUp(self):
+        class TestHttpClient(HALHttpClient):
+            PERMANENT_REDIRECTS = MemoryCache()
+            MAX_REDIRECTS = 3
+        self.client = TestHttpClient
+        responses.reset()
+
+    @responses.activate
+    def test_redirect_loop_detected(self):
+        responses.add(responses.POST, 'http://api.test_domain/a', status=201,
+                      headers={'Location': 'http://api.test_domain/b'})
+        responses.add(responses.GET, 'http://api.test_domain/b', status=202, headers={'Location': '/b'})
+        self.assertRaises(RedirectLoopError, self.client.request, 'http://api.test_domain/a', method='POST', data={})
+
+    @responses.activate
+    def test_too_many_redirects(self):
+        for i in range(5):
+            responses.add(responses.GET, 'http://api.test_domain/%s' % i, status=202,
+                          headers={'Location': '/%s' % (i + 1)})
+        self.assertRaises(TooManyRedirects, self.client.request, 'http://api.test_domain/0')
+
+    @responses.activate
+    def test_relative_location_and_missing_location(self):
+        responses.add(responses.POST, 'http://api.test_domain/a', status=201, headers={'Location': '/b'})
+        responses.add(responses.GET, 'http://api.test_domain/b', status=204)
+        resp = self.client.request('http://api.test_domain/a', method='POST', data={})
+        self.assertEqual(resp.status_code, 204)
+        self.assertEqual(resp.url, 'http://api.test_domain/b')
+
+    @responses.activate
+    def test_redirect_without_location(self):
+        responses.add(responses.POST, 'http://api.test_domain/a', status=201)
+        self.assertRaises(MissingLocationError, self.client.request, 'http://api.test_domain/a', method='POST', data={})
+
+    @responses.activate
+    def test_permanent_redirects_are_remembered(self):
+        responses.add(responses.GET, 'http://api.test_domain/old', status=301,
+                      headers={'Location': 'http://api.test_domain/older'})
+        responses.add(responses.GET, 'http://api.test_domain/older', status=308,
+                      headers={'Location': 'http://api.test_domain/new'})
+        responses.add(responses.GET, 'http://api.test_domain/new', body='{}', status=200)
+        self.assertEqual(self.client.request('http://api.test_domain/old').url, 'http://api.test_domain/new')
+        self.assertEqual(len(responses.calls), 3)
+        self.assertEqual(self.client.request('http://api.test_domain/old').url, 'http://api.test_domain/new')
+        self.assertEqual(len(responses.calls), 4)
+        self.assertEqual(self.client.PERMANENT_REDIRECTS.get('http://api.test_domain/old'), 'http://api.test_domain/new')
+
+    @responses.activate
+    def test_temporary_redirects_are_not_remembered(self):
+        responses.add(responses.GET, 'http://api.test_domain/old', status=302,
+                      headers={'Location': 'http://api.test_domain/new'})
+        responses.add(responses.GET, 'http://api.test_domain/new', body='{}', status=200)
+        self.client.request('http://api.test_domain/old')
+        self.assertIsNone(self.client.PERMANENT_REDIRECTS.get('http://api.test_domain/old'))
+
+
+class TestCoalescing(TestCase):
+    def setUp(self):
+        class CoalescingHttpClient(HALHttpClient):
+            COALESCE_REQUESTS = True
+        self.client = CoalescingHttpClient
+        self.calls = []
+
+        def slow(request):
+            self.calls.append(request.url)
+            time.sleep(0.2)
+            return 200, {}, json.dumps({"_links": {"self": {"href": "/popular"}}, "n": len(self.calls)})
+        responses.reset()
+        responses.add_callback(responses.GET, 'http://api.test_domain/popular', callback=slow,
+                               content_type='application/json')
+
+    def run_together(self, fn, n=5):
+        with ThreadPoolExecutor(max_workers=n) as executor:
+            return list(executor.map(lambda _: fn(), range(n)))
+
+    @responses.activate
+    def test_concurrent_gets_make_one_request(self):
+        session = self.client.make_session()
+        results = self.run_together(lambda: self.client.request('http://api.test_domain/popular', session=session))
+        self.assertEqual(len(self.calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+
+    @responses.activate
+    def test_concurrent_follows_share_the_document(self):
+        root = HALEasy('http://api.test_domain/', json_str='{"_links": {"popular": {"href": "/popular"}}}',
+                       session=self.client.make_session(), http_client_class=self.client)
+        results = self.run_together(lambda: root.link(rel='popular').follow())
+        self.assertEqual(len(self.calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+
+    @responses.activate
+    def test_concurrent_haleasy_calls_without_a_session_make_one_request(self):
+        results = self.run_together(lambda: HALEasy('http://api.test_domain/popular', http_client_class=self.client))
+        self.assertEqual(len(self.calls), 1)
+        self.assertTrue(all(h['n'] == 1 and h.session is results[0].session for h in results))
+        results = self.run_together(lambda: HALEasy('http://api.test_domain/popular', http_client_class=self.client,
+                                                    auth=HTTPBasicAuth('u', 'p')), n=2)
+        self.assertEqual(len(self.calls), 2)  # equal auth objects count as the same credentials
+        self.assertIs(results[0].session, results[1].session)
+
+    @responses.activate
+    def test_different_credentials_are_not_coalesced(self):
+        users = ['alice', 'bob']
+        results = self.run_together(lambda: HALEasy('http://api.test_domain/popular', http_client_class=self.client,
+                                                    auth=(users.pop(), 'secret')), n=2)
+        self.assertEqual(len(self.calls), 2)
+        self.assertIsNot(results[0].session, results[1].session)
+
+    @responses.activate
+    def test_different_sessions_are_not_coalesced(self):
+        results = self.run_together(lambda: self.client.request('http://api.test_domain/popular',
+                                                                session=self.client.make_session()), n=2)
+        self.assertEqual(len(self.calls), 2)
+        self.assertIsNot(results[0], results[1])
+
+    @responses.activate
+    def test_errors_are_shared(self):
+        def fail():
+            time.sleep(0.2)
+            raise ValueError('boom')
+        results = self.run_together(lambda: self._capture(lambda: self.client.coalesce('key', fail)))
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+    @staticmethod
+    def _capture(fn):
+        try:
+            return fn()
+        except Exception as e:
+            return e
@@ -1,5 +1,8 @@
 from unittest import TestCase
-from haleasy import listify, make_preview_url, HALHttpClient
+from haleasy import listify, make_preview_url, HALHttpClient, HALEasy, JSONCodec, default_json_codec, \
+    compile_uri_template, curie_expander, resolve_url, url_host
+import json
+import mock
 
 
 class TestListify(TestCase):
@@ -20,7 +23,8 @@ class TestMakePreviewUrl(TestCase):
             self.assertEqual(make_preview_url(untrue_value, 'dummyhost.com'), '')
 
     def test_full_urls_are_unchanged(self):
-        for teststring in ('http://',
+        for teststring in ('https://a.com/foo',
+                           'http://',
                            'http://a',
                            'http://a.com',
                            'http://a.com/',
@@ -37,3 +41,93 @@ class TestMakePreviewUrl(TestCase):
                            'foo/bar?b&%c=4'):
             self.assertEqual(make_preview_url(teststring, 'http://dummyhost.com'),
                              'http://dummyhost.com/{}'.format(teststring))
+
+
+class TestJSONCodec(TestCase):
+    def test_stdlib_codec_accepts_text_and_bytes(self):
+        codec = JSONCodec(json)
+        self.assertEqual(codec.loads('{"a": "\\u00e9"}'), {'a': u'é'})
+        self.assertEqual(codec.loads(u'{"a": "é"}'.encode('utf-8')), {'a': u'é'})
+        self.assertEqual(json.loads(codec.dumps({'a': 1})), {'a': 1})
+
+    def test_first_installed_preferred_module_is_used(self):
+        fake_module = object()
+
+        def import_module(name):
+            if name == 'ujson':
+                return fake_module
+            raise ImportError(name)
+
+        with mock.patch('haleasy.importlib.import_module', import_module):
+            self.assertIs(default_json_codec(('orjson', 'ujson')).module, fake_module)
+            self.assertIs(default_json_codec(('orjson',)).module, json)
+
+    def test_stdlib_json_is_the_default(self):
+        self.assertIs(HALEasy.JSON_CODEC.module, json)
+        self.assertIs(HALHttpClient.JSON_CODEC.module, json)
+        h = HALEasy('http://ex.com/', json_str=b'{"big": 123456789012345678901234567890}')
+        self.assertEqual(h['big'], 123456789012345678901234567890)
+
+    def test_codec_hook_is_used(self):
+        codec = mock.Mock(wraps=JSONCodec(json))
+
+        class MyHALEasy(HALEasy):
+            JSON_CODEC = codec
+
+        h = MyHALEasy('http://ex.com/', json_str=b'{"a": 1}')
+        self.assertEqual(h['a'], 1)
+        codec.loads.assert_called_once_with(b'{"a": 1}')
+
+
+class TestURITemplates(TestCase):
+    def test_templates_compiled_once(self):
+        compiled = compile_uri_template('http://ex.com/users/{name}')
+        self.assertIs(compile_uri_template('http://ex.com/users/{name}'), compiled)
+        self.assertEqual(compiled.expand({'name': 'fred'}), 'http://ex.com/users/fred')
+
+    def test_expand_many(self):
+        h = HALEasy('http://ex.com/', json_str=json.dumps({
+            "_links": {"user": {"href": "/users/{name}{?fields}", "templated": True},
+                       "plain": {"href": "/users/{name}"}}}))
+        self.assertEqual(h.link(rel='user').expand_many([{'name': 'fred'}, {'name': 'jim', 'fields': 'a'}]),
+                         ['http://ex.com/users/fred', 'http://ex.com/users/jim?fields=a'])
+        self.assertEqual(h.link(rel='plain').expand_many([{'name': 'fred'}]), ['http://ex.com/users/{name}'])
+
+
+class TestUrlResolution(TestCase):
+    def test_resolve_url(self):
+        self.assertEqual(resolve_url('http://ex.com/a/b', 'c'), 'http://ex.com/a/c')
+        self.assertEqual(resolve_url('http://ex.com/a/b', '/c'), 'http://ex.com/c')
+        self.assertEqual(resolve_url('http://ex.com/a/b', 'https://other.com/'), 'https://other.com/')
+        self.assertIs(resolve_url('http://ex.com/a/b', 'c'), resolve_url('http://ex.com/a/b', 'c'))
+
+    def test_url_host(self):
+        self.assertEqual(url_host('https://ex.com:8080/a/b?c#d'), 'https://ex.com:8080')
+        self.assertIs(url_host('https://ex.com/a'), url_host('https://ex.com/a'))
+
+
+class TestCurieExpansion(TestCase):
+    def make(self, url, curies):
+        return HALEasy(url, json_str=json.dumps({"_links": {"curies": curies,
+                                                            "ex:widget": {"href": "/widgets/1"}}}))
+
+    def test_expansions_match_dougrain(self):
+        h = self.make('http://api.test_domain/a', [{"name": "ex", "href": "/rels/{rel}", "templated": True},
+                                                   {"name": "plain", "href": "http://rels.test_domain/plain"}])
+        expand = curie_expander(h.doc)
+        for rel in ('ex:widget', 'plain:thing', 'other:widget', 'next', 'http://rels.test_domain/x'):
+            self.assertEqual(expand(rel), h.doc.expand_curie(rel))
+        self.assertEqual(h.link(rel='ex:widget').href, '/widgets/1')
+        self.assertEqual(h.link(rel='http://api.test_domain/rels/widget').href, '/widgets/1')
+
+    def test_expanders_shared_by_documents_with_the_same_curies(self):
+        curies = [{"name": "ex", "href": "http://rels.test_domain/shared/{rel}", "templated": True}]
+        a = self.make('http://api.test_domain/a', curies)
+        b = self.make('http://api.test_domain/b', curies)
+        c = self.make('http://api.test_domain/c', [{"name": "ex", "href": "http://other/{rel}", "templated": True}])
+        self.assertIs(curie_expander(a.doc), curie_expander(b.doc))
+        self.assertIsNot(curie_expander(a.doc), curie_expander(c.doc))
+        with mock.patch('haleasy.compile_uri_template', wraps=compile_uri_template) as compile_mock:
+            a.links(rel='ex:widget')
+            b.links(rel='ex:widget')
+            self.assertEqual(compile_mock.call_count, 1)
@@ -0,0 +1,96 @@
+from unittest import TestCase
+from haleasy import HALEasy, HALHttpClient, MetricsCollector, MemoryCache, Histogram
+import json
+import responses
+
+
+class TestInstrumentation(TestCase):
+    root = {
+        "_links": {
+            "self": {"href": "/api_root"},
+            "users": {"href": "/old_users"}
+        }
+    }
+
+    def setUp(self):
+        self.events = []
+        self.collector = MetricsCollector()
+
+        class ObservedHttpClient(HALHttpClient):
+            OBSERVERS = (self.events.append, self.collector)
+            CACHE = MemoryCache()
+            PERMANENT_REDIRECTS = None
+        self.client = ObservedHttpClient
+        responses.reset()
+        responses.add(responses.GET, 'http://api.test_domain/api_root',
+                      body=json.dumps(self.root), status=200, content_type='application/json',
+                      headers={'Cache-Control': 'max-age=60'})
+        responses.add(responses.POST, 'http://api.test_domain/old_users', status=201,
+                      headers={'Location': '/users'})
+        responses.add(responses.GET, 'http://api.test_domain/users',
+                      body='{"count": 0}', status=200, content_type='application/json')
+
+    def event_names(self):
+        return [e['event'] for e in self.events]
+
+    @responses.activate
+    def test_events_emitted(self):
+        h = HALEasy('http://api.test_domain/api_root', http_client_class=self.client)
+        self.assertEqual(self.event_names(), ['request_start', 'request_end', 'parse'])
+        end = self.events[1]
+        self.assertEqual(end['status'], 200)
+        self.assertEqual(end['bytes'], len(json.dumps(self.root)))
+        self.assertEqual(end['host'], 'http://api.test_domain')
+        self.assertTrue(end['elapsed'] >= 0)
+
+        del self.events[:]
+        h.link(rel='users').follow(method='POST')
+        self.assertEqual(self.event_names(), ['link_index', 'request_start', 'request_end', 'redirect',
+                                              'request_start', 'request_end', 'parse', 'follow'])
+        self.assertEqual(self.events[3]['location'], 'http://api.test_domain/users')
+        self.assertEqual(self.events[-1]['rel'], 'users')
+
+        del self.events[:]
+        HALEasy('http://api.test_domain/api_root', http_client_class=self.client)
+        self.assertEqual(self.event_names(), ['cache_hit', 'parse'])
+
+    @responses.activate
+    def test_collector_aggregates_by_rel_and_host(self):
+        h = HALEasy('http://api.test_domain/api_root', http_client_class=self.client)
+        h.link(rel='users').follow(method='POST')
+        self.assertEqual(self.collector.histogram('follow', rel='users').count, 1)
+        self.assertEqual(self.collector.histogram('request_end', host='http://api.test_domain').count, 3)
+        summary = self.collector.summary()
+        self.assertEqual(summary['events']['request_start'], 3)
+        self.assertEqual(summary['rel']['users']['follow']['count'], 1)
+        json.dumps(summary)  # plain data only
+
+    def test_histogram(self):
+        histogram = Histogram(buckets=(1, 10, float('inf')))
+        for value in (0.5, 2, 3, 100):
+            histogram.add(value)
+        self.assertEqual(histogram.counts, [1, 2, 1])
+        self.assertEqual(histogram.as_dict()['mean'], 26.375)
+        self.assertEqual((histogram.min, histogram.max), (0.5, 100))
+
+    def test_add_observer(self):
+        class MyHttpClient(HALHttpClient):
+            pass
+        MyHttpClient.add_observer(self.events.append)
+        MyHttpClient.emit('custom', a=1)
+        HALHttpClient.emit('custom', a=2)
+        self.assertEqual(self.events, [{'event': 'custom', 'a': 1}])
+
+    @responses.activate
+    def test_observer_added_during_a_request(self):
+        class MyHttpClient(HALHttpClient):
+            pass
+
+        def respond(request):
+            MyHttpClient.add_observer(self.events.append)
+            return 200, {}, json.dumps(self.root)
+        responses.reset()
+        responses.add_callback(responses.GET, 'http://api.test_domain/api_root', callback=respond,
+                               content_type='application/json')
+        HALEasy('http://api.test_domain/api_root', http_client_class=MyHttpClient)
+        self.assertEqual(self.event_names(), ['parse'])
@@ -0,0 +1,51 @@
+from unittest import TestCase, skipIf
+from haleasy import HALEasy, HALEasyLink, ijson
+import json
+import responses
+
+
+@skipIf(ijson is None, 'ijson is not installed')
+class TestHalEasyStream(TestCase):
+    collection = {
+        "_links": {
+            "self": {"href": "/items"},
+            "curies": [{"name": "ex", "href": "http://ex/{rel}", "templated": True}],
+            "ex:search": {"href": "/search"},
+            "item": [{"href": "/items/%s" % i} for i in range(3)]
+        },
+        "count": 3,
+        "_embedded": {
+            "item": [{"_links": {"self": {"href": "/items/%s" % i}}, "n": i, "f": i + 0.5} for i in range(3)],
+            "summary": {"total": 3}
+        },
+        "page": {"number": 1}
+    }
+
+    def setUp(self):
+        responses.reset()
+        responses.add(responses.GET, 'http://api.test_domain/items',
+                      body=json.dumps(self.collection), status=200,
+                      content_type='application/json')
+
+    @responses.activate
+    def test_items_yielded_in_document_order(self):
+        items = list(HALEasy.stream('http://api.test_domain/items'))
+        self.assertEqual([rel for rel, _ in items],
+                         ['self', 'http://ex/search', 'item', 'item', 'item', 'item', 'item', 'item', 'summary'])
+        self.assertIsInstance(items[1][1], HALEasyLink)
+        self.assertEqual(items[1][1].url(), 'http://api.test_domain/search')
+
+    @responses.activate
+    def test_embedded_items_are_previews(self):
+        previews = list(HALEasy.stream('http://api.test_domain/items').embedded(rel='item'))
+        self.assertEqual([p['n'] for p in previews], [0, 1, 2])
+        self.assertEqual(previews[1]['f'], 1.5)
+        self.assertTrue(previews[1].is_preview)
+        self.assertEqual(previews[1].fetched_from, 'http://api.test_domain/items/1')
+
+    @responses.activate
+    def test_links_and_properties(self):
+        stream = HALEasy.stream('http://api.test_domain/items')
+        links = list(stream.links(rel='item'))
+        self.assertEqual([l.url() for l in links], ['http://api.test_domain/items/%s' % i for i in range(3)])
+        self.assertEqual(stream.properties, {'count': 3, 'page': {'number': 1}})